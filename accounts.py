@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+from config import (
+    logger,
+    ACCOUNTS_FILE,
+    EMBEDDING_DUPLICATE_THRESHOLD,
+    MAX_POSTS_PER_HOUR,
+    POSTED_FILE,
+    x_credentials,
+)
+from deduper import PostHistory, get_history
+from embeddings import score_novelty
+from keywords import get_matcher
+from metrics import ITEMS
+
+
+@dataclass
+class Account:
+    """One X account the pipeline posts to."""
+
+    name: str
+    credentials: str = ""  # Profile: X_<CREDENTIALS>_API_KEY etc.; "" = X_API_KEY
+    keywords: Optional[List[str]] = None  # Topics to post about; None = all
+    posted_file: str = POSTED_FILE  # Posting history used for dedupe
+    max_posts_per_hour: int = MAX_POSTS_PER_HOUR
+    max_posts_per_run: int = 3
+    active_hours: Optional[List[int]] = None  # [start, end) local hours to post
+    fast_path: bool = True  # Whether breaking news may skip ranking
+    enabled: bool = True
+    recent_posts: Deque[float] = field(default_factory=deque, repr=False)
+
+    def x_credentials(self) -> Dict[str, Optional[str]]:
+        return x_credentials(self.credentials)
+
+    def history(self) -> PostHistory:
+        return get_history(self.posted_file)
+
+    def wants(self, article) -> bool:
+        """True if an article is about one of this account's topics."""
+        if not self.keywords:
+            return True
+        return get_matcher(self.keywords).matches(
+            article.get("title"),
+            article.get("snippet"),
+            " ".join(article.get("topics") or []),
+        )
+
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        if not self.active_hours:
+            return True
+        start, end = self.active_hours
+        hour = (now or datetime.now()).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def posts_allowed_now(self) -> int:
+        """How many more posts fit under this account's schedule right now."""
+        if not self.is_active():
+            return 0
+        cutoff = time.time() - 3600
+        while self.recent_posts and self.recent_posts[0] < cutoff:
+            self.recent_posts.popleft()
+        return max(0, self.max_posts_per_hour - len(self.recent_posts))
+
+
+def default_account() -> Account:
+    """The single account configured by the X_* variables and POSTED_FILE."""
+    return Account(name="default")
+
+
+def _from_entry(entry: dict) -> Optional[Account]:
+    known = set(Account.__dataclass_fields__) - {"recent_posts"}
+    unknown = set(entry) - known
+    if unknown:
+        logger.warning(f"Ignoring unknown account fields {sorted(unknown)}")
+    try:
+        account = Account(**{k: v for k, v in entry.items() if k in known})
+    except TypeError as e:
+        logger.warning(f"Skipping invalid account entry {entry}: {e}")
+        return None
+    if account.active_hours and len(account.active_hours) != 2:
+        logger.warning(f"Ignoring active_hours for '{account.name}': need [start, end]")
+        account.active_hours = None
+    return account
+
+
+_accounts: Optional[List[Account]] = None
+
+
+def load_accounts(path: str = ACCOUNTS_FILE) -> List[Account]:
+    """
+    Load enabled accounts from the JSON file at path. Falls back to the single
+    default account when the file is missing or unreadable. Accounts are
+    loaded once per process so their posting schedules persist between runs.
+    """
+    global _accounts
+    if _accounts is not None:
+        return _accounts
+    if not os.path.exists(path):
+        accounts = [default_account()]
+    else:
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+            accounts = [a for a in map(_from_entry, entries) if a and a.enabled]
+            logger.info(f"Loaded {len(accounts)} accounts from {path}")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Failed to load {path}: {e}. Using the default account.")
+            accounts = [default_account()]
+
+    files = [a.posted_file for a in accounts]
+    if len(set(files)) != len(files):
+        logger.warning("Several accounts share a posted_file; they will share history")
+    _accounts = accounts or [default_account()]
+    return _accounts
+
+
+def is_duplicate_for(account: Account, article) -> bool:
+    """Already posted, a TF-IDF duplicate or a paraphrase for this account."""
+    history = account.history()
+    if history.is_posted_url(article["link"]):
+        return True
+    if history.is_duplicate(article["full_text"]):
+        return True
+    novelty = score_novelty(article, history.embedding_store())
+    if novelty is not None and novelty < 1 - EMBEDDING_DUPLICATE_THRESHOLD:
+        logger.info(
+            f"[{account.name}] Paraphrase of a past post: {article.get('title', '')[:50]}..."
+        )
+        ITEMS.inc(stage="paraphrase")
+        return True
+    return False
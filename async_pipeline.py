@@ -0,0 +1,338 @@
+"""
+Asyncio variant of the pipeline (ASYNC_PIPELINE=true).
+
+One event loop drives every run: feeds, article pages and link checks are
+downloaded on a shared httpx client, LLM calls go through llm.ainvoke and
+text-only posts through tweepy's async client, so hundreds of requests can be
+in flight on a single core. Each article flows from download to extraction,
+fast path, dedupe and summary as soon as its page arrives, without waiting
+for the rest of its source.
+
+Work that has no async API (feed and HTML parsing, TF-IDF dedupe, embeddings,
+history writes, posts with images) runs in worker threads via
+asyncio.to_thread.
+Collection runs in a TaskGroup under a per-run deadline (RUN_DEADLINE_SECONDS):
+when it expires every download and LLM call still in flight is cancelled, and
+the run ranks and posts what it has collected.
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from config import (
+    logger,
+    EXECUTOR_DRAIN_SECONDS,
+    POLL_TICK_SECONDS,
+    RUN_DEADLINE_SECONDS,
+)
+from accounts import Account, load_accounts
+from discovery import mark_links_seen, site_of
+from fastpath import try_fast_path
+from fetcher import (
+    aextract_candidate,
+    alist_candidates,
+    extraction_settled,
+    log_extraction_stats,
+    poll_results,
+    reset_fetch_cache,
+)
+from http_client import ais_reachable, close_async_client
+from jobstore import claim_post, finish_post
+from main import (
+    article_queues,
+    finish_run,
+    interested_accounts,
+    needs_summary,
+    nlp_summary,
+    poller,
+    queue_article,
+    record_posted,
+    take_ranking_batch,
+)
+from metrics import ITEMS, LAST_RUN, RETRIES, observe_stage, stage_timer
+from post_generator import generate_post
+from poster import post_to_x_async
+from profiling import maybe_profile
+from ranker import rank_news_items_async
+from records import ArticleRecord
+from sources import Source, load_sources
+from summarizer import summarize_article_async
+
+
+class AsyncRun:
+    """State shared by the tasks of one async pipeline run."""
+
+    def __init__(self, accounts: List[Account]):
+        self.accounts = accounts
+        self.collected: List[ArticleRecord] = []
+
+    async def prepare(self, article: ArticleRecord) -> List[Account]:
+        """Async main.prepare_article: dedupe per account, then summarize once."""
+        # Runs alongside other articles' dedupe and fast-path checks: each
+        # check fits its own vectorizer and histories lock their own state
+        interested = await asyncio.to_thread(
+            interested_accounts, article, self.accounts
+        )
+        if interested and needs_summary(article):
+            article["snippet"] = await summarize_article_async(
+                article["full_text"], fallback=nlp_summary(article)
+            )
+        return interested
+
+    async def handle(
+        self, source: Source, candidate: Dict, slots: asyncio.Semaphore
+    ):
+        """Take one candidate link from download to the account queues."""
+        async with slots:
+            article = await aextract_candidate(source, candidate)
+        if article is None:
+            return
+        if await asyncio.to_thread(try_fast_path, article, source):
+            article.release()
+            return
+        ITEMS.inc(stage="fetched")
+        interested = await self.prepare(article)
+        if not interested:
+            return
+        for account in interested:
+            queue_article(account, article)
+        self.collected.append(article)
+        logger.info(
+            f"Queued article for {', '.join(a.name for a in interested)}: "
+            f"{article.get('title', '')[:50]}..."
+        )
+
+    async def collect_source(self, source: Source):
+        """Poll one source and handle its candidates, max_concurrency at a time."""
+        started = time.monotonic()
+        try:
+            candidates = await alist_candidates(source)
+        except Exception as e:
+            logger.error(f"Failed to fetch {source.name} ({source.url}): {e}")
+            return
+        slots = asyncio.Semaphore(source.max_concurrency)
+        finished = []
+
+        async def handle(candidate: Dict):
+            try:
+                await self.handle(source, candidate, slots)
+            except Exception as e:
+                logger.error(f"Failed to process {candidate['link']}: {e}")
+            finished.append(candidate["link"])
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for candidate in candidates:
+                    tg.create_task(handle(candidate))
+        finally:
+            # Links cut off by the deadline or failing transiently stay unseen
+            # for the next run
+            if source.type == "scrape":
+                settled = [link for link in finished if extraction_settled(link)]
+                mark_links_seen(site_of(source.url), settled)
+            skipped = len(candidates) - len(finished)
+            if skipped:
+                logger.warning(
+                    f"Run deadline hit for {source.name}: skipped {skipped} of "
+                    f"{len(candidates)} articles"
+                )
+            poll_results[source.name]["seconds"] = time.monotonic() - started
+            observe_stage("fetch", poll_results[source.name]["seconds"])
+
+
+async def post_to_x_with_retry_async(
+    post: dict, credentials: dict, max_retries: int = 2
+) -> bool:
+    """main.post_to_x_with_retry without blocking the event loop."""
+    for attempt in range(max_retries + 1):
+        if await post_to_x_async(post, credentials):
+            return True
+        if attempt < max_retries:
+            retry_delay = 60 * (2**attempt) + random.uniform(0, 30)
+            logger.warning(
+                f"Post attempt {attempt + 1} failed (likely 403 spam flag). "
+                f"Retrying in {retry_delay:.0f}s..."
+            )
+            RETRIES.inc()
+            await asyncio.sleep(retry_delay)
+    logger.error("All post retries failed.")
+    return False
+
+
+async def post_for_account_async(
+    account: Account, plan: List[Tuple[ArticleRecord, dict]]
+) -> int:
+    """main.post_for_account: one account's posts, with delays, on the loop."""
+    credentials = account.x_credentials()
+    posted_count = 0
+    for idx, (article, post) in enumerate(plan):
+        if not claim_post(account.name, article["link"]):
+            logger.info(
+                f"[{account.name}] Already claimed elsewhere: {article['link']}"
+            )
+            continue
+        success = await post_to_x_with_retry_async(post, credentials)
+        finish_post(account.name, article["link"], success)
+        if success:
+            await asyncio.to_thread(record_posted, account, article)
+            posted_count += 1
+            logger.info(
+                f"[{account.name}] Successfully posted "
+                f"(total so far: {posted_count}/{len(plan)})"
+            )
+        else:
+            logger.error(
+                f"[{account.name}] Post failed after retries - check logs above"
+            )
+        if idx < len(plan) - 1:
+            delay = post.get("recommended_delay", random.uniform(60, 180))
+            logger.info(f"⏳ [{account.name}] Delaying {delay:.0f}s before next post")
+            await asyncio.sleep(delay)
+    return posted_count
+
+
+async def rank_and_post_async(
+    accounts: List[Account], new_articles: List[ArticleRecord], run_stats: dict
+):
+    """main.rank_and_post on the event loop."""
+    # Ranking runs one account at a time (it shares the local LLM)
+    plans = []
+    ranked_pool: List[ArticleRecord] = []
+    for account in accounts:
+        batch, allowed = await asyncio.to_thread(take_ranking_batch, account)
+        if not batch:
+            continue
+        ranked_pool.extend(batch)
+        ranked = await rank_news_items_async(batch)
+        selected = ranked[: min(account.max_posts_per_run, allowed)]
+        logger.info(
+            f"[{account.name}] Ranked {len(ranked)} articles, posting {len(selected)}"
+        )
+        if selected:
+            plans.append((account, selected))
+
+    # Check every link at once; generate_post then reuses the cached results
+    selected_links = {a["link"] for _, selected in plans for a in selected}
+    async with asyncio.TaskGroup() as tg:
+        for link in selected_links:
+            tg.create_task(ais_reachable(link))
+    generated: Dict[str, dict] = {}
+    for account, selected in plans:
+        for article in selected:
+            if article["link"] not in generated:
+                generated[article["link"]] = generate_post(article)
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [
+            tg.create_task(
+                post_for_account_async(
+                    account, [(a, generated[a["link"]]) for a in selected]
+                )
+            )
+            for account, selected in plans
+        ]
+    run_stats["posted"] = sum(task.result() for task in tasks)
+    finish_run(new_articles + ranked_pool, run_stats)
+
+
+async def run_pipeline_async(sources: List[Source], run_stats: dict):
+    accounts = load_accounts()
+    reset_fetch_cache()
+    run = AsyncRun(accounts)
+
+    try:
+        async with asyncio.timeout(RUN_DEADLINE_SECONDS):
+            async with asyncio.TaskGroup() as tg:
+                for source in sources:
+                    tg.create_task(run.collect_source(source))
+    except TimeoutError:
+        logger.warning(
+            f"Run deadline of {RUN_DEADLINE_SECONDS:.0f}s hit; continuing with "
+            f"{len(run.collected)} articles collected so far"
+        )
+
+    run_stats["fetched"] = run_stats["queued"] = len(run.collected)
+    logger.info(f"Collected {len(run.collected)} articles from {len(sources)} sources")
+    for source in sources:
+        result = poll_results.get(source.name)
+        if result:
+            poller.observe(
+                source, result["entry_times"], result["new_links"], result["seconds"]
+            )
+    poller.save()
+    log_extraction_stats()
+
+    if not run.collected and all(q.empty() for q in article_queues.values()):
+        logger.info("No new articles found; skipping post.")
+        return
+    await rank_and_post_async(accounts, run.collected, run_stats)
+
+
+async def drain_executor(executor: ThreadPoolExecutor):
+    """
+    Wait, off the event loop and for at most EXECUTOR_DRAIN_SECONDS, for a
+    run's worker threads to finish. Calls abandoned at the run deadline (a
+    hung embedding, a rate-limited post) are left to finish in the background.
+    """
+    try:
+        async with asyncio.timeout(EXECUTOR_DRAIN_SECONDS):
+            await asyncio.to_thread(executor.shutdown, True)
+    except TimeoutError:
+        logger.warning(
+            f"Worker threads still busy {EXECUTOR_DRAIN_SECONDS:.0f}s after the run; "
+            "leaving them to finish in the background"
+        )
+
+
+async def pipeline_job_async():
+    """main.pipeline_job on the event loop."""
+    sources = poller.due(load_sources())
+    if not sources:
+        return
+    logger.info(f"Running async pipeline job for {len(sources)} due sources...")
+    run_stats = {"sources": len(sources), "fetched": 0, "queued": 0, "posted": 0}
+    started = time.time()
+    # Fresh worker threads for asyncio.to_thread each run, so a profiled run
+    # sees them all start and they have exited by the time it reports
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(thread_name_prefix="pipeline")
+    loop.set_default_executor(executor)
+    try:
+        with maybe_profile(), stage_timer("pipeline"):
+            try:
+                await run_pipeline_async(sources, run_stats)
+            finally:
+                loop.set_default_executor(ThreadPoolExecutor())
+                await drain_executor(executor)
+    except Exception as e:
+        logger.error(f"Async pipeline run failed: {e}")
+    finally:
+        LAST_RUN.set(started, field="timestamp")
+        LAST_RUN.set(time.time() - started, field="duration_seconds")
+        for field, value in run_stats.items():
+            LAST_RUN.set(value, field=field)
+
+
+async def serve():
+    """Run the pipeline every POLL_TICK_SECONDS on this event loop."""
+    logger.info(
+        f"Starting async pipeline, checking for due sources every "
+        f"{POLL_TICK_SECONDS}s..."
+    )
+    try:
+        while True:
+            tick = time.monotonic()
+            await pipeline_job_async()
+            elapsed = time.monotonic() - tick
+            await asyncio.sleep(max(0.0, POLL_TICK_SECONDS - elapsed))
+    finally:
+        await close_async_client()
+
+
+def run_async_pipeline():
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Pipeline stopped.")
@@ -0,0 +1,4 @@
+import sys
+from benchmark.run import main
+
+sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Synthetic corpus generator: crypto-flavoured articles, RSS feeds, homepages
+and posting history at arbitrary scale.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+SUBJECTS = [
+    "Bitcoin",
+    "Ethereum",
+    "Solana",
+    "An NFT marketplace",
+    "A Web3 startup",
+    "The SEC",
+    "A crypto exchange",
+    "A blockchain consortium",
+    "Stablecoin issuers",
+    "DeFi protocols",
+]
+VERBS = [
+    "surges past",
+    "drops below",
+    "partners with",
+    "launches",
+    "faces scrutiny over",
+    "raises funding for",
+    "announces",
+    "rolls back",
+    "integrates",
+    "expands",
+]
+OBJECTS = [
+    "a new all-time high",
+    "a layer-2 scaling upgrade",
+    "institutional custody",
+    "a spot ETF application",
+    "cross-chain bridges",
+    "a token buyback",
+    "tokenized treasuries",
+    "a developer grant program",
+    "on-chain governance",
+    "regulatory guidance",
+]
+FILLER = (
+    "analysts said trading volume climbed across major venues while on-chain data "
+    "showed long-term holders adding to positions market makers expect volatility "
+    "to remain elevated as liquidity shifts between centralized and decentralized "
+    "venues developers continue shipping upgrades that reduce fees and improve "
+    "throughput for users and institutions"
+).split()
+
+
+class Corpus:
+    """Deterministic generator; the same seed always yields the same corpus."""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+
+    def title(self) -> str:
+        return (
+            f"{self.rng.choice(SUBJECTS)} {self.rng.choice(VERBS)} "
+            f"{self.rng.choice(OBJECTS)}"
+        )
+
+    def paragraph(self, words: int = 60) -> str:
+        text = " ".join(self.rng.choice(FILLER) for _ in range(words))
+        return text[0].upper() + text[1:] + "."
+
+    def article(self, paragraphs: int = 8) -> Dict[str, str]:
+        title = self.title()
+        return {
+            "title": title,
+            "text": " ".join(
+                [title + "."] + [self.paragraph() for _ in range(paragraphs)]
+            ),
+        }
+
+    def slug(self, title: str, index: int) -> str:
+        words = "".join(c if c.isalnum() else " " for c in title.lower()).split()
+        return "-".join(words[:8] + [str(index)])
+
+    def article_html(self, title: str, text: str, published: datetime) -> str:
+        paragraphs = "".join(f"<p>{escape(p)}</p>" for p in text.split(". "))
+        return (
+            "<html><head>"
+            f"<title>{escape(title)}</title>"
+            f'<meta property="og:title" content="{escape(title)}">'
+            '<meta property="article:published_time" '
+            f'content="{published.isoformat()}">'
+            "</head><body><nav><a href='/tags/bitcoin'>Bitcoin</a></nav>"
+            f"<article><h1>{escape(title)}</h1>{paragraphs}</article>"
+            "</body></html>"
+        )
+
+    def rss_feed(self, base_url: str, entries: List[Dict]) -> str:
+        items = "".join(
+            "<item>"
+            f"<title>{escape(e['title'])}</title>"
+            f"<link>{escape(e['link'])}</link>"
+            f"<description>{escape(e['text'][:300])}</description>"
+            f"<pubDate>{format_datetime(e['published'])}</pubDate>"
+            "</item>"
+            for e in entries
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0"><channel>'
+            f"<title>Bench feed</title><link>{escape(base_url)}</link>"
+            f"{items}</channel></rss>"
+        )
+
+    def homepage(self, links: List[str]) -> str:
+        anchors = "".join(
+            f'<li><a href="{escape(link)}">story</a></li>' for link in links
+        )
+        noise = "".join(
+            f'<a href="/tags/topic-{i}">tag</a><a href="/category/news-{i}">cat</a>'
+            for i in range(20)
+        )
+        return f"<html><body><nav>{noise}</nav><ul>{anchors}</ul></body></html>"
+
+    def site(self, base_url: str, articles: int) -> Dict[str, str]:
+        """
+        Build a synthetic site: url -> body for an RSS feed at base_url + "rss",
+        a homepage at base_url and one HTML page per article.
+        """
+        now = datetime.now(timezone.utc)
+        pages: Dict[str, str] = {}
+        entries = []
+        for i in range(articles):
+            article = self.article()
+            link = f"{base_url}news/{self.slug(article['title'], i)}"
+            published = now - timedelta(minutes=5 * i)
+            pages[link] = self.article_html(
+                article["title"], article["text"], published
+            )
+            entries.append({**article, "link": link, "published": published})
+        pages[base_url + "rss"] = self.rss_feed(base_url, entries)
+        pages[base_url] = self.homepage([e["link"] for e in entries])
+        return pages
+
+    def history(self, size: int, days: int = 30) -> Dict[str, List]:
+        """A posted.json-shaped history with size entries spread over days."""
+        now = datetime.now().timestamp()
+        span = days * 86400 * 0.9
+        return {
+            "urls": [f"https://bench.local/posted/{i}" for i in range(size)],
+            "timestamps": [now - self.rng.random() * span for _ in range(size)],
+            "texts": [self.article()["text"][:2000] for _ in range(size)],
+        }
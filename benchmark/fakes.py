@@ -0,0 +1,228 @@
+"""
+Local stand-ins for the network: a fixture-replaying HTTP session, a fake
+Ollama server with configurable latency and a stub X (tweepy) client.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from types import SimpleNamespace
+import requests
+
+
+class FakeResponse:
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+    def close(self):
+        pass
+
+
+class FixtureSession:
+    """
+    Drop-in for the shared requests.Session that serves pages from memory.
+    latency is added to every request to mimic network round trips.
+    """
+
+    def __init__(self, pages: Dict[str, str], latency: float = 0.0):
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        self.headers: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _respond(self, url: str) -> FakeResponse:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        body = self.pages.get(url)
+        if body is None:
+            return FakeResponse(url, 404, "")
+        return FakeResponse(url, 200, body)
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        return self._respond(url)
+
+    def head(self, url: str, **kwargs) -> FakeResponse:
+        response = self._respond(url)
+        response.text, response.content = "", b""
+        return response
+
+
+def load_fixture_pages(fixtures_dir: str) -> Dict[str, str]:
+    """Read index.json (url -> file name) from fixtures_dir and load the files."""
+    with open(os.path.join(fixtures_dir, "index.json"), "r") as f:
+        index = json.load(f)
+    pages = {}
+    for url, name in index.items():
+        with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+            pages[url] = f.read()
+    return pages
+
+
+def record_fixtures(urls, fixtures_dir: str):
+    """Download urls through the shared session and save them as fixtures."""
+    from http_client import get_session
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    index = {}
+    for i, url in enumerate(urls):
+        response = get_session().get(url, timeout=15)
+        response.raise_for_status()
+        name = f"page_{i}.html"
+        with open(os.path.join(fixtures_dir, name), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        index[url] = name
+    with open(os.path.join(fixtures_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def _fake_embedding(text: str, dim: int = 64):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    values = [digest[i % len(digest)] - 127.5 for i in range(dim)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class FakeOllama:
+    """
+    Minimal Ollama HTTP API (/api/chat, /api/generate, /api/embed, /api/tags)
+    that answers after latency seconds. Ranking prompts get a numbered top-3
+    list; everything else gets a short news-style summary.
+    """
+
+    def __init__(self, latency: float = 0.5, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.calls = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, payload, status=200, stream=False):
+                self.send_response(status)
+                self.send_header(
+                    "Content-Type",
+                    "application/x-ndjson" if stream else "application/json",
+                )
+                self.end_headers()
+                if stream:
+                    for chunk in payload:
+                        self.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+                else:
+                    self.wfile.write(json.dumps(payload).encode("utf-8"))
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send({"models": [{"name": "bench-model"}]})
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                fake.calls += 1
+                time.sleep(fake.latency)
+                if self.path == "/api/embed":
+                    inputs = body.get("input", "")
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    self._send(
+                        {
+                            "model": body.get("model"),
+                            "embeddings": [_fake_embedding(t) for t in inputs],
+                        }
+                    )
+                elif self.path in ("/api/chat", "/api/generate"):
+                    self._chat(body)
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def _chat(self, body):
+                if self.path == "/api/chat":
+                    prompt = " ".join(
+                        m.get("content", "") for m in body.get("messages", [])
+                    )
+                else:
+                    prompt = body.get("prompt", "")
+                if "ranking assistant" in prompt:
+                    content = "1. First story\n2. Second story\n3. Third story"
+                else:
+                    content = (
+                        "Breaking: Bitcoin rallies as institutional demand returns, "
+                        "with analysts pointing to record ETF inflows this week."
+                    )
+                stats = {
+                    "done": True,
+                    "done_reason": "stop",
+                    "prompt_eval_count": len(prompt) // 4,
+                    "eval_count": len(content) // 4,
+                    "total_duration": int(fake.latency * 1e9),
+                }
+                base = {
+                    "model": body.get("model"),
+                    "created_at": "2025-01-01T00:00:00Z",
+                }
+                if self.path == "/api/chat":
+                    message = {"role": "assistant", "content": content}
+                    final = {**base, "message": {"role": "assistant", "content": ""}}
+                    first = {**base, "message": message, "done": False}
+                else:
+                    final = {**base, "response": ""}
+                    first = {**base, "response": content, "done": False}
+                if body.get("stream", True):
+                    self._send([first, {**final, **stats}], stream=True)
+                else:
+                    self._send({**first, **stats})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeXClient:
+    """Stands in for tweepy.Client; create_tweet succeeds after latency seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tweets = []
+        self._ids = itertools.count(1)
+
+    def create_tweet(self, text: str, media_ids=None):
+        time.sleep(self.latency)
+        tweet_id = str(next(self._ids))
+        self.tweets.append({"id": tweet_id, "text": text, "media_ids": media_ids})
+        return SimpleNamespace(data={"id": tweet_id, "text": text})
+
+
+class FakeMediaAPI:
+    """Stands in for tweepy.API for media uploads."""
+
+    def __init__(self, *args, **kwargs):
+        self._ids = itertools.count(1000)
+
+    def media_upload(self, filename: str):
+        return SimpleNamespace(media_id_string=str(next(self._ids)))
@@ -0,0 +1,247 @@
+"""
+Offline benchmark for the pipeline stages.
+
+Replays recorded or synthetic pages through fetcher, runs ranker and
+summarizer against a local fake Ollama, posts through a stub X client and
+scales deduper history, reporting per-stage latency, throughput and peak
+memory. Nothing leaves the machine.
+
+    python -m benchmark --sites 4 --articles 50 --history 100,1000,10000
+    python -m benchmark --fixtures --stages fetch,generate
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmark.corpus import Corpus
+from benchmark.fakes import (
+    FakeMediaAPI,
+    FakeOllama,
+    FakeXClient,
+    FixtureSession,
+    load_fixture_pages,
+)
+
+ALL_STAGES = ["fetch", "dedupe", "summarize", "rank", "generate", "post"]
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class StageResult:
+    def __init__(self, name: str, items: int, seconds: float, peak_bytes: int):
+        self.name = name
+        self.items = items
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+        self.latencies: List[float] = []
+
+    def as_dict(self) -> Dict:
+        lat = sorted(self.latencies)
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "seconds": round(self.seconds, 4),
+            "throughput_per_s": round(self.items / self.seconds, 2)
+            if self.seconds
+            else None,
+            "mean_ms": round(statistics.mean(lat) * 1000, 2) if lat else None,
+            "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 2)
+            if lat
+            else None,
+            "peak_mb": round(self.peak_bytes / 2**20, 2),
+        }
+
+
+class Bench:
+    def __init__(self, track_memory: bool = True, verbose: bool = False):
+        self.track_memory = track_memory
+        self.verbose = verbose
+        self.results: List[StageResult] = []
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        if self.verbose:
+            yield
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+
+    def run(
+        self,
+        name: str,
+        fn: Callable,
+        items: Optional[List] = None,
+    ) -> List:
+        """
+        Time fn, once per item if items is given (recording per-item latency)
+        or once overall. Returns fn's results.
+        """
+        if self.track_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        outputs = []
+        latencies = []
+        started = time.perf_counter()
+        with self._quiet():
+            if items is None:
+                outputs = fn()
+            else:
+                for item in items:
+                    t0 = time.perf_counter()
+                    outputs.append(fn(item))
+                    latencies.append(time.perf_counter() - t0)
+        seconds = time.perf_counter() - started
+        peak = 0
+        if self.track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        count = len(items) if items is not None else len(outputs or [])
+        result = StageResult(name, count, seconds, peak)
+        result.latencies = latencies
+        self.results.append(result)
+        return outputs
+
+    def report(self) -> str:
+        header = (
+            f"{'stage':<22}{'items':>8}{'total s':>10}{'mean ms':>10}"
+            f"{'p95 ms':>10}{'items/s':>10}{'peak MB':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for r in (r.as_dict() for r in self.results):
+            lines.append(
+                f"{r['stage']:<22}{r['items']:>8}{r['seconds']:>10.3f}"
+                f"{r['mean_ms'] if r['mean_ms'] is not None else '-':>10}"
+                f"{r['p95_ms'] if r['p95_ms'] is not None else '-':>10}"
+                f"{r['throughput_per_s'] if r['throughput_per_s'] else '-':>10}"
+                f"{r['peak_mb']:>10}"
+            )
+        return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--stages", default=",".join(ALL_STAGES))
+    parser.add_argument(
+        "--fixtures",
+        nargs="?",
+        const=FIXTURES_DIR,
+        help="Replay a recorded fixtures directory (default: the bundled one)",
+    )
+    parser.add_argument("--sites", type=int, default=2, help="Synthetic sites")
+    parser.add_argument("--articles", type=int, default=25, help="Articles per site")
+    parser.add_argument("--history", default="100,1000,10000")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--llm-items", type=int, default=5)
+    parser.add_argument("--net-latency", type=float, default=0.0)
+    parser.add_argument("--ollama-latency", type=float, default=0.2)
+    parser.add_argument("--x-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc")
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    ollama = FakeOllama(latency=args.ollama_latency).start()
+
+    # Everything the pipeline persists goes to a scratch dir; config reads
+    # these at import time, so set them before importing pipeline modules.
+    os.environ["POSTED_FILE"] = os.path.join(workdir, "posted.json")
+    os.environ["SEEN_LINKS_FILE"] = os.path.join(workdir, "seen_links.json")
+    os.environ["POLL_STATE_FILE"] = os.path.join(workdir, "poll_state.json")
+    os.environ["OLLAMA_HOST"] = ollama.url
+    os.environ["OLLAMA_BASE_URL"] = ollama.url
+
+    import discovery
+    import deduper
+    import fetcher
+    import http_client
+    import poster
+    import tweepy
+    from post_generator import generate_post
+    from ranker import Rank_News_Items
+    from sources import load_sources, Source
+    from summarizer import summarize_article
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    corpus = Corpus(seed=args.seed)
+    if args.fixtures:
+        pages = load_fixture_pages(args.fixtures)
+        sources = load_sources(os.path.join(args.fixtures, "sources.json"))
+    else:
+        pages = {}
+        sources = []
+        for i in range(args.sites):
+            base = f"https://site{i}.bench.local/"
+            pages.update(corpus.site(base, args.articles))
+            sources.append(Source(name=f"site{i}-rss", type="rss", url=base + "rss"))
+            sources.append(Source(name=f"site{i}-scrape", type="scrape", url=base))
+    session = FixtureSession(pages, latency=args.net_latency)
+    http_client._session = session
+
+    bench = Bench(track_memory=not args.no_memory, verbose=args.verbose)
+    articles: List[Dict] = []
+
+    if "fetch" in stages:
+        discovery.seen_links.clear()
+        discovery._seen_loaded = True
+        fetcher.reset_fetch_cache()
+        articles = bench.run(
+            "fetch+extract", lambda: fetcher.fetch_sources(sources, 3600)
+        )
+        print(f"fetch: {session.requests} HTTP requests for {len(pages)} pages")
+    if not articles:
+        articles = [
+            {**a, "full_text": a["text"], "snippet": a["text"][:300], "link": f"u{i}"}
+            for i, a in enumerate(corpus.article() for _ in range(args.candidates))
+        ]
+
+    if "dedupe" in stages:
+        candidates = [corpus.article()["text"] for _ in range(args.candidates)]
+        for size in (int(s) for s in args.history.split(",") if s.strip()):
+            with open(deduper.POSTED_FILE, "w") as f:
+                json.dump(corpus.history(size), f)
+            bench.run(f"dedupe@{size}", deduper.is_duplicate, candidates)
+
+    llm_items = articles[: args.llm_items]
+    if "summarize" in stages:
+        bench.run("summarize", summarize_article, [a["full_text"] for a in llm_items])
+    if "rank" in stages:
+        bench.run("rank", Rank_News_Items, [articles[: max(3, args.candidates)]])
+
+    posts = []
+    if "generate" in stages or "post" in stages:
+        posts = bench.run("generate", generate_post, llm_items)
+    if "post" in stages:
+        x_client = FakeXClient(latency=args.x_latency)
+        poster.init_twitter_client = lambda *a, **k: x_client
+        tweepy.API = FakeMediaAPI
+        tweepy.OAuth1UserHandler = lambda *a, **k: None
+        bench.run("post", poster.post_to_x, posts)
+
+    ollama.stop()
+    print(f"fake ollama calls: {ollama.calls}")
+    print(bench.report())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.as_dict() for r in bench.results], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,11 +17,96 @@ X_API_SECRET = os.getenv("X_API_SECRET")
 X_ACCESS_TOKEN = os.getenv("X_ACCESS_TOKEN")
 X_ACCESS_SECRET = os.getenv("X_ACCESS_SECRET")
 
+X_CREDENTIAL_NAMES = ("API_KEY", "API_SECRET", "ACCESS_TOKEN", "ACCESS_SECRET")
+
+
+def x_credentials(profile: str = "") -> dict:
+    """
+    X API keys for a credential profile, read from X_<PROFILE>_API_KEY etc.
+    The default (empty) profile uses the unprefixed X_API_KEY variables.
+    """
+    prefix = f"X_{profile.upper()}_" if profile else "X_"
+    return {name.lower(): os.getenv(prefix + name) for name in X_CREDENTIAL_NAMES}
+
+
 POSTED_FILE = os.getenv("POSTED_FILE", "posted.json")
 IMAGE_FOLDER = os.getenv(
     "IMAGE_FOLDER", "image"
 )  # Base folder for images, with subfolders like 'crypto', 'nft', etc.
 
+# Accounts to post to (JSON list; see accounts.py). When the file is missing a
+# single account uses the X_* credentials and POSTED_FILE above.
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "accounts.json")
+
+# Worker mode: several processes or hosts share one SQLite job store (e.g. on
+# a shared volume). An elected leader schedules polls and posts; every worker
+# extracts and summarizes; each post is claimed in the store before sending.
+WORKER_MODE = os.getenv("WORKER_MODE", "false").lower() == "true"
+WORKER_ID = os.getenv("WORKER_ID", "")  # Defaults to hostname:pid
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "2"))
+JOB_STORE_PATH = os.getenv(
+    "JOB_STORE_PATH", os.path.join(os.path.dirname(POSTED_FILE), "jobs.sqlite3")
+)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "90"))
+
+# Asyncio pipeline (see async_pipeline.py): one event loop overlaps every
+# fetch, link check, LLM call and post instead of blocking a thread on each.
+# Each run stops collecting articles at its deadline and ranks what it has.
+ASYNC_PIPELINE = os.getenv("ASYNC_PIPELINE", "false").lower() == "true"
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "100"))
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "600"))
+# How long a finished run waits for its worker threads before moving on
+EXECUTOR_DRAIN_SECONDS = float(os.getenv("EXECUTOR_DRAIN_SECONDS", "30"))
+
+# Source registry (JSON list of sources; see sources.py). When the file is
+# missing, RSS_URLS and SCRAPE_BASE_URLS below are used instead.
+SOURCES_FILE = os.getenv("SOURCES_FILE", "sources.json")
+FETCH_BUDGET_SECONDS = float(os.getenv("FETCH_BUDGET_SECONDS", "300"))
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "4"))
+
+# Adaptive polling: each source is polled about as often as it publishes,
+# within these bounds and global budgets (see polling.py)
+POLL_STATE_FILE = os.getenv(
+    "POLL_STATE_FILE", os.path.join(os.path.dirname(POSTED_FILE), "poll_state.json")
+)
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "60"))
+POLL_MIN_INTERVAL_SECONDS = int(os.getenv("POLL_MIN_INTERVAL_SECONDS", "300"))
+POLL_MAX_INTERVAL_SECONDS = int(os.getenv("POLL_MAX_INTERVAL_SECONDS", "21600"))
+POLL_MAX_REQUESTS_PER_HOUR = int(os.getenv("POLL_MAX_REQUESTS_PER_HOUR", "60"))
+POLL_TICK_BUDGET_SECONDS = float(os.getenv("POLL_TICK_BUDGET_SECONDS", "120"))
+MAX_POSTS_PER_HOUR = int(os.getenv("MAX_POSTS_PER_HOUR", "3"))
+
+# Breaking-news fast path: fresh articles from high-priority sources that
+# mention one of these keywords are posted immediately, skipping batch ranking
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "false").lower() == "true"
+FAST_PATH_MIN_PRIORITY = int(os.getenv("FAST_PATH_MIN_PRIORITY", "8"))
+FAST_PATH_KEYWORDS = [
+    "breaking",
+    "hack",
+    "exploit",
+    "etf",
+    "sec",
+    "lawsuit",
+    "approval",
+    "all-time high",
+    "crash",
+]
+FAST_PATH_MAX_POSTS_PER_HOUR = int(os.getenv("FAST_PATH_MAX_POSTS_PER_HOUR", "2"))
+FAST_PATH_MAX_AGE_SECONDS = int(os.getenv("FAST_PATH_MAX_AGE_SECONDS", "3600"))
+FAST_PATH_TARGET_LATENCY_SECONDS = int(
+    os.getenv("FAST_PATH_TARGET_LATENCY_SECONDS", "600")
+)
+
+# On-demand profiling of pipeline runs: "off", "next" (profile the first run
+# after startup) or "always". A run can also be requested via POST /profile.
+PROFILE_MODE = os.getenv("PIPELINE_PROFILE", "off").lower()
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(os.path.dirname(POSTED_FILE), "profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "10"))
+
 # RSS feeds and scrape URLs
 RSS_URLS = [
     "https://cointelegraph.com/rss",
@@ -55,6 +140,80 @@ SCRAPE_BASE_URLS = [
 
 KEYWORDS = ["crypto", "nft", "web3", "blockchain", "ethereum", "bitcoin"]
 
+# Extra spellings that count as a match for a keyword (matched on word boundaries)
+KEYWORD_ALIASES = {
+    "crypto": ["cryptocurrency", "cryptocurrencies", "cryptos"],
+    "nft": ["nfts", "non-fungible token", "non-fungible tokens"],
+    "web3": ["web 3", "web 3.0"],
+    "blockchain": ["blockchains"],
+    "ethereum": ["eth", "ether"],
+    "bitcoin": ["btc", "bitcoins"],
+}
+
+# HTTP settings (shared pooled session used by all fetch paths)
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Extraction settings: pages whose paragraph text is shorter than this fall back
+# from the fast lxml pass to a full newspaper parse
+FAST_EXTRACT_MIN_CHARS = int(os.getenv("FAST_EXTRACT_MIN_CHARS", "500"))
+
+# Link discovery: which homepage links count as articles. Patterns are matched
+# against the canonical URL path; sites without an entry use the default, which
+# wants a hyphenated slug and skips tag/category/author listings.
+DEFAULT_ARTICLE_URL_PATTERN = (
+    r"^(?!/(?:tags?|categor(?:y|ies)|authors?|topics?|page|search)(?:/|$))"
+    r"(?:/[^/]+)*/[a-z0-9]+(?:-[a-z0-9]+){2,}(?:\.html?)?$"
+)
+ARTICLE_URL_PATTERNS = {
+    "cointelegraph.com": r"^/(?:news|magazine|explained)/[a-z0-9-]+$",
+}
+SEEN_LINKS_FILE = os.getenv(
+    "SEEN_LINKS_FILE", os.path.join(os.path.dirname(POSTED_FILE), "seen_links.json")
+)
+
+# Semantic novelty: article embeddings from a local Ollama model, kept in a
+# memory-mapped file alongside the posting history (see embeddings.py)
+EMBEDDING_ENABLED = os.getenv("EMBEDDING_ENABLED", "true").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDINGS_FILE = os.getenv(
+    "EMBEDDINGS_FILE", os.path.join(os.path.dirname(POSTED_FILE), "embeddings.f32")
+)
+# Cosine similarity to a past post above which an article is a paraphrase
+EMBEDDING_DUPLICATE_THRESHOLD = float(
+    os.getenv("EMBEDDING_DUPLICATE_THRESHOLD", "0.92")
+)
+NOVELTY_TOP_K = int(os.getenv("NOVELTY_TOP_K", "5"))
+
+# LLM calls (see llm.py). Each task runs on a model tier with its own latency
+# budget; after LLM_BREAKER_FAILURES failures in a row a model is skipped (the
+# callers' fallbacks are used) for LLM_BREAKER_COOLDOWN_SECONDS.
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "hf.co/bartowski/Llama-3.2-1B-Instruct-GGUF")
+LLM_MODEL_TIERS = {
+    "tiny": os.getenv("LLM_TINY_MODEL", OLLAMA_MODEL),
+    "default": OLLAMA_MODEL,
+    "large": os.getenv("LLM_LARGE_MODEL", OLLAMA_MODEL),
+}
+LLM_TASK_TIERS = {
+    "rank": os.getenv("LLM_RANK_TIER", "tiny"),
+    "summarize": os.getenv("LLM_SUMMARIZE_TIER", "default"),
+}
+LLM_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_DEFAULT_TIMEOUT_SECONDS", "60"))
+LLM_TASK_TIMEOUTS = {
+    "rank": float(os.getenv("LLM_RANK_TIMEOUT_SECONDS", "30")),
+    "summarize": float(os.getenv("LLM_SUMMARIZE_TIMEOUT_SECONDS", "45")),
+    "embed": float(os.getenv("LLM_EMBED_TIMEOUT_SECONDS", "15")),  # EMBEDDING_MODEL
+}
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "120"))
+# Concurrent LLM calls from the asyncio pipeline (Ollama serializes most models)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "1"))
+
+# Prompt budgets (estimated tokens): articles are condensed to their lead and
+# key sentences before summarizing, ranking snippets to their key sentences
+SUMMARY_INPUT_TOKENS = int(os.getenv("SUMMARY_INPUT_TOKENS", "600"))
+RANK_SNIPPET_TOKENS = int(os.getenv("RANK_SNIPPET_TOKENS", "60"))
+
 # Queue settings
 POST_QUEUE_SIZE = 100  # Max items in queue
 POST_INTERVAL_SECONDS = 3600  # Post every hour (3600 seconds)
@@ -1,94 +1,189 @@
+import fcntl
+import itertools
 import json
 import os
+import threading
 from datetime import datetime, timedelta
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import Dict, List
-from config import logger, POSTED_FILE, DUPLICATE_THRESHOLD, HISTORY_RETENTION_DAYS
+from typing import Dict, List, Optional
+from config import (
+    logger,
+    POSTED_FILE,
+    EMBEDDINGS_FILE,
+    DUPLICATE_THRESHOLD,
+    HISTORY_RETENTION_DAYS,
+)
+from embeddings import embed, get_store
+from lazy import lazy_import
+from metrics import ITEMS, timed
+from records import CompactText
 
-vectorizer = TfidfVectorizer(max_features=5000, stop_words="english")
 
-# Initialize posted_data with default structure
-posted_data: Dict[str, List] = {"urls": [], "timestamps": [], "texts": []}
+def new_vectorizer():
+    """
+    A TF-IDF vectorizer for one duplicate check; fit_transform refits it, so
+    checks running on several threads must not share one.
+    """
+    text = lazy_import("sklearn.feature_extraction.text")
+    return text.TfidfVectorizer(max_features=5000, stop_words="english")
+
+
+_KEYS = ("urls", "timestamps", "texts")
+
+
+class PostHistory:
+    """
+    Posting history of one account: URLs, timestamps and (truncated) texts of
+    past posts in a JSON file, plus the matching embedding store. Texts are
+    held as CompactText and only decoded while a duplicate check or save
+    needs them; the file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, posted_file: str = POSTED_FILE, embeddings_file: str = ""):
+        self.posted_file = posted_file
+        self.embeddings_file = embeddings_file or (
+            EMBEDDINGS_FILE
+            if posted_file == POSTED_FILE
+            else os.path.splitext(posted_file)[0] + "_embeddings.f32"
+        )
+        self.data: Dict[str, List] = {k: [] for k in _KEYS}
+        self._loaded_mtime: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def _write(self):
+        # Replace rather than rewrite, so other processes never read half a file
+        tmp = f"{self.posted_file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {**self.data, "texts": [str(t) for t in self.data["texts"]]},
+                f,
+                indent=2,
+            )
+        os.replace(tmp, self.posted_file)
+        self._loaded_mtime = os.path.getmtime(self.posted_file)
+
+    def load(self) -> Dict[str, List]:
+        with self._lock:
+            if not os.path.exists(self.posted_file):
+                logger.info(
+                    f"No posted file found at {self.posted_file}. Initializing new data."
+                )
+                self.data = {k: [] for k in _KEYS}
+                self._write()
+                return self.data
+
+            if os.path.getmtime(self.posted_file) == self._loaded_mtime:
+                return self.data
+
+            try:
+                with open(self.posted_file, "r") as f:
+                    loaded_data = json.load(f)
+                # Ensure all required keys exist
+                for key in _KEYS:
+                    if key not in loaded_data:
+                        logger.warning(
+                            f"Missing key '{key}' in {self.posted_file}. Adding default."
+                        )
+                        loaded_data[key] = []
+                loaded_data["texts"] = [CompactText(t) for t in loaded_data["texts"]]
+                self.data = loaded_data
+                self._loaded_mtime = os.path.getmtime(self.posted_file)
+                logger.info(f"Loaded posted data from {self.posted_file}")
+            except (json.JSONDecodeError, IOError) as e:
+                # Never overwrite a shared history we could not read; keep what
+                # we had and try again on the next load
+                logger.error(
+                    f"Failed to load {self.posted_file}: {e}. Keeping the last "
+                    f"loaded data ({len(self.data['urls'])} posts)."
+                )
+            return self.data
+
+    def is_posted_url(self, url: str) -> bool:
+        return bool(url) and url in self.load()["urls"]
+
+    @timed("dedupe")
+    def is_duplicate(self, full_text: str) -> bool:
+        data = self.load()
+        # Check if texts exist and are non-empty
+        if not data.get("texts"):
+            return False
+        try:
+            pairwise = lazy_import("sklearn.metrics.pairwise")
+            # Decode history texts one at a time as the vectorizer consumes them
+            texts = itertools.chain([full_text], (str(t) for t in data["texts"]))
+            vectors = new_vectorizer().fit_transform(texts)
+            sims = pairwise.cosine_similarity(vectors[0:1], vectors[1:])[0]
+            duplicate = any(s > DUPLICATE_THRESHOLD for s in sims)
+            ITEMS.inc(stage="duplicate" if duplicate else "unique")
+            return duplicate
+        except Exception as e:
+            logger.error(f"Error in duplicate check: {e}")
+            return False
+
+    def embedding_store(self):
+        return get_store(self.embeddings_file)
+
+    def save(self, url: str, full_text: str, embedding=None):
+        cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).timestamp()
+        now = datetime.now().timestamp()
+        vector = embedding if embedding is not None else embed(full_text)
+        # The file lock keeps read-modify-write of the history and its
+        # embedding store safe when several worker processes share them
+        with self._lock, open(self.posted_file + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            data = self.load()
+            # Clean old records
+            filtered = [
+                (u, t, txt)
+                for u, t, txt in zip(data["urls"], data["timestamps"], data["texts"])
+                if t > cutoff
+            ]
+            data["urls"] = [u for u, _, _ in filtered]
+            data["timestamps"] = [t for _, t, _ in filtered]
+            data["texts"] = [txt for _, _, txt in filtered]
+
+            data["urls"].append(url)
+            data["timestamps"].append(now)
+            data["texts"].append(CompactText(full_text[:2000]))  # Truncate
+
+            try:
+                self._write()
+                logger.info(f"Saved posted article: {url}")
+            except Exception as e:
+                logger.error(f"Failed to save posted data: {e}")
+
+            # Keep the embedding store indexed alongside the history
+            try:
+                store = self.embedding_store()
+                if vector is not None:
+                    store.add(url, vector, now)
+                store.prune(data["urls"])
+            except Exception as e:
+                logger.error(f"Failed to update embedding store: {e}")
+
+
+_histories: Dict[str, PostHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_history(posted_file: str = POSTED_FILE) -> PostHistory:
+    """The shared PostHistory for posted_file (one per account)."""
+    with _histories_lock:
+        if posted_file not in _histories:
+            _histories[posted_file] = PostHistory(posted_file)
+        return _histories[posted_file]
 
 
 def load_posted() -> Dict[str, List]:
-    global posted_data
-    default_data = {"urls": [], "timestamps": [], "texts": []}
-
-    if not os.path.exists(POSTED_FILE):
-        logger.info(f"No posted file found at {POSTED_FILE}. Initializing new data.")
-        posted_data = default_data
-        with open(POSTED_FILE, "w") as f:
-            json.dump(posted_data, f, indent=2)
-        return posted_data
-
-    try:
-        with open(POSTED_FILE, "r") as f:
-            loaded_data = json.load(f)
-            # Ensure all required keys exist
-            for key in default_data:
-                if key not in loaded_data:
-                    logger.warning(
-                        f"Missing key '{key}' in {POSTED_FILE}. Adding default."
-                    )
-                    loaded_data[key] = default_data[key]
-            posted_data = loaded_data
-            logger.info("Loaded posted data")
-    except (json.JSONDecodeError, IOError) as e:
-        logger.error(f"Failed to load {POSTED_FILE}: {e}. Initializing default data.")
-        posted_data = default_data
-        with open(POSTED_FILE, "w") as f:
-            json.dump(posted_data, f, indent=2)
-
-    return posted_data
+    return get_history().load()
+
+
+def is_posted_url(url: str) -> bool:
+    return get_history().is_posted_url(url)
 
 
 def is_duplicate(full_text: str) -> bool:
-    load_posted()
-    # Check if texts exist and are non-empty
-    if not posted_data.get("texts"):
-        return False
-    try:
-        vectors = vectorizer.fit_transform([full_text] + posted_data["texts"])
-        sims = cosine_similarity(vectors[0:1], vectors[1:])[0]
-        return any(s > DUPLICATE_THRESHOLD for s in sims)
-    except Exception as e:
-        logger.error(f"Error in duplicate check: {e}")
-        return False
-
-
-def save_posted(url: str, full_text: str):
-    load_posted()
-    cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).timestamp()
-
-    # Clean old records
-    filtered = [
-        (u, t, txt)
-        for u, t, txt in zip(
-            posted_data["urls"], posted_data["timestamps"], posted_data["texts"]
-        )
-        if t > cutoff
-    ]
-    if filtered:
-        urls, timestamps, texts = zip(*filtered)
-        posted_data["urls"] = list(urls)
-        posted_data["timestamps"] = list(timestamps)
-        posted_data["texts"] = list(texts)
-    else:
-        posted_data["urls"], posted_data["timestamps"], posted_data["texts"] = (
-            [],
-            [],
-            [],
-        )
+    return get_history().is_duplicate(full_text)
 
-    posted_data["urls"].append(url)
-    posted_data["timestamps"].append(datetime.now().timestamp())
-    posted_data["texts"].append(full_text[:2000])  # Truncate for storage
 
-    try:
-        with open(POSTED_FILE, "w") as f:
-            json.dump(posted_data, f, indent=2)
-        logger.info(f"Saved posted article: {url}")
-    except Exception as e:
-        logger.error(f"Failed to save posted data: {e}")
+def save_posted(url: str, full_text: str, embedding=None):
+    get_history().save(url, full_text, embedding)
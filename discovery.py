@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from config import (
+    logger,
+    ARTICLE_URL_PATTERNS,
+    DEFAULT_ARTICLE_URL_PATTERN,
+    SEEN_LINKS_FILE,
+    HISTORY_RETENTION_DAYS,
+)
+from keywords import KeywordMatcher
+from lazy import lazy_import
+
+_compiled_patterns: Dict[str, re.Pattern] = {}
+
+# site -> {canonical url: first-seen timestamp}
+seen_links: Dict[str, Dict[str, float]] = {}
+_seen_loaded = False
+_seen_lock = threading.Lock()
+
+
+def site_of(url: str) -> str:
+    """Host of url without a leading "www.", used to key per-site settings."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def canonicalize_url(base_url: str, href: str) -> Optional[str]:
+    """
+    Resolve href against base_url and reduce it to one canonical form:
+    lowercase scheme/host, no query string or fragment, no trailing slash.
+    Returns None for non-http(s) links.
+    """
+    parts = urlsplit(urljoin(base_url, href.strip()))
+    if parts.scheme not in ("http", "https"):
+        return None
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+def _article_pattern(site: str) -> re.Pattern:
+    if site not in _compiled_patterns:
+        _compiled_patterns[site] = re.compile(
+            ARTICLE_URL_PATTERNS.get(site, DEFAULT_ARTICLE_URL_PATTERN), re.IGNORECASE
+        )
+    return _compiled_patterns[site]
+
+
+def discover_links(base_url: str, html: str, matcher: KeywordMatcher) -> List[str]:
+    """
+    Return canonical article URLs on a homepage that match the keywords.
+    Only <a href> tags are parsed; links off-site, links that don't fit the
+    site's article-URL pattern (tag/category/author pages) and duplicates are
+    dropped.
+    """
+    site = site_of(base_url)
+    pattern = _article_pattern(site)
+    bs4 = lazy_import("bs4")
+    anchors = bs4.SoupStrainer("a", href=True)
+    soup = bs4.BeautifulSoup(html, "lxml", parse_only=anchors)
+
+    links: Dict[str, None] = {}
+    for a in soup.find_all("a", href=True):
+        url = canonicalize_url(base_url, a["href"])
+        if not url or site_of(url) != site:
+            continue
+        path = urlsplit(url).path
+        if pattern.search(path) and matcher.matches(path):
+            links.setdefault(url, None)
+    return list(links)
+
+
+def _load_seen():
+    global _seen_loaded
+    if _seen_loaded:
+        return
+    _seen_loaded = True
+    if not os.path.exists(SEEN_LINKS_FILE):
+        return
+    try:
+        with open(SEEN_LINKS_FILE, "r") as f:
+            seen_links.update(json.load(f))
+        logger.info(f"Loaded seen links for {len(seen_links)} sites")
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Failed to load {SEEN_LINKS_FILE}: {e}. Starting empty.")
+
+
+def filter_new_links(site: str, links: List[str]) -> List[str]:
+    """Drop links already handed to extraction in an earlier run."""
+    with _seen_lock:
+        _load_seen()
+        seen = seen_links.get(site, {})
+        return [link for link in links if link not in seen]
+
+
+def mark_links_seen(site: str, links: List[str]):
+    """Remember links for site and persist, pruning entries past retention."""
+    if not links:
+        return
+    with _seen_lock:
+        _load_seen()
+        now = datetime.now().timestamp()
+        cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).timestamp()
+        site_seen = {
+            url: ts for url, ts in seen_links.get(site, {}).items() if ts > cutoff
+        }
+        for link in links:
+            site_seen.setdefault(link, now)
+        seen_links[site] = site_seen
+        try:
+            with open(SEEN_LINKS_FILE, "w") as f:
+                json.dump(seen_links, f)
+        except Exception as e:
+            logger.error(f"Failed to save seen links: {e}")
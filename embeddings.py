@@ -0,0 +1,221 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from config import (
+    logger,
+    EMBEDDING_ENABLED,
+    EMBEDDINGS_FILE,
+    NOVELTY_TOP_K,
+)
+from lazy import lazy_import
+from llm import embed_query
+from metrics import timed
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAX_EMBED_CHARS = 2000  # Same truncation as the stored posting history
+
+
+def embed(text: str) -> Optional["np.ndarray"]:
+    """
+    Unit-length float32 embedding of text, or None if embedding failed, timed
+    out or was skipped because the embedding model's circuit is open.
+    """
+    if not EMBEDDING_ENABLED or not text:
+        return None
+    np = lazy_import("numpy")
+    try:
+        vector = np.asarray(embed_query(text[:MAX_EMBED_CHARS]), "float32")
+    except Exception as e:
+        logger.warning(f"Embedding failed: {e}")
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+class EmbeddingStore:
+    """
+    Embeddings of posted articles, one float32 row per post.
+
+    Rows live in a flat file that is memory-mapped for searches, so history
+    size costs disk rather than RAM; a small JSON index next to it maps rows
+    to posted URLs and timestamps. Vectors are stored unit-length, so cosine
+    similarity is a single matrix-vector product.
+
+    Several worker processes may share the files: every add, prune and search
+    holds a file lock and first re-reads the index if another process has
+    changed it.
+    """
+
+    def __init__(self, path: str = EMBEDDINGS_FILE):
+        self.path = path
+        self.index_file = os.path.splitext(path)[0] + ".json"
+        self.index: Dict = {"dim": 0, "urls": [], "timestamps": []}
+        self._matrix = None
+        self._index_stamp = None  # stat of the index file as last read
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, open(self.index_file + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _stat_index(self):
+        try:
+            st = os.stat(self.index_file)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _refresh(self):
+        """Re-read the index if it changed on disk since this process read it."""
+        if self._stat_index() != self._index_stamp:
+            self._matrix = None
+            self._load()
+
+    def _load(self):
+        self._index_stamp = self._stat_index()
+        try:
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {"dim": 0, "urls": [], "timestamps": []}
+            return
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Failed to load {self.index_file}: {e}. Starting empty.")
+            self._reset()
+            return
+        rows = len(self.index["urls"])
+        expected = rows * self.index["dim"] * 4
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < expected:
+            logger.error(f"{self.path} does not match its index. Starting empty.")
+            self._reset()
+
+    def _reset(self):
+        self.index = {"dim": 0, "urls": [], "timestamps": []}
+        self._matrix = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._save_index()
+
+    def _save_index(self):
+        # Replace rather than rewrite, so a reader never sees half an index
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_file)
+        self._index_stamp = self._stat_index()
+
+    def __len__(self) -> int:
+        return len(self.index["urls"])
+
+    def matrix(self):
+        """Memory-mapped (rows, dim) view of the stored vectors."""
+        np = lazy_import("numpy")
+        rows = len(self)
+        if rows == 0:
+            return np.empty((0, self.index["dim"] or 1), "float32")
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(
+                self.path, dtype="float32", mode="r", shape=(rows, self.index["dim"])
+            )
+        return self._matrix
+
+    def add(self, url: str, vector: "np.ndarray", timestamp: float):
+        """Append one post's embedding."""
+        with self._locked():
+            self._refresh()
+            if self.index["dim"] and vector.shape[0] != self.index["dim"]:
+                logger.warning(
+                    f"Embedding size changed ({self.index['dim']} -> "
+                    f"{vector.shape[0]}); rebuilding the embedding store"
+                )
+                self._reset()
+            self.index["dim"] = int(vector.shape[0])
+            # Drop any rows a crashed writer appended without indexing them
+            expected = len(self) * self.index["dim"] * 4
+            if os.path.exists(self.path) and os.path.getsize(self.path) > expected:
+                os.truncate(self.path, expected)
+            with open(self.path, "ab") as f:
+                f.write(vector.astype("float32").tobytes())
+            self.index["urls"].append(url)
+            self.index["timestamps"].append(timestamp)
+            self._save_index()
+
+    def prune(self, keep_urls: Iterable[str]):
+        """Drop rows for posts that fell out of the posting history."""
+        keep_urls = set(keep_urls)
+        with self._locked():
+            self._refresh()
+            keep = [i for i, url in enumerate(self.index["urls"]) if url in keep_urls]
+            if len(keep) == len(self):
+                return
+            np = lazy_import("numpy")
+            kept = np.array(self.matrix()[keep])
+            self._matrix = None
+            tmp = self.path + ".tmp"
+            kept.tofile(tmp)
+            os.replace(tmp, self.path)
+            self.index["urls"] = [self.index["urls"][i] for i in keep]
+            self.index["timestamps"] = [self.index["timestamps"][i] for i in keep]
+            self._save_index()
+            logger.info(f"Pruned embedding store to {len(keep)} posts")
+
+    def search(
+        self, vector: "np.ndarray", k: int = NOVELTY_TOP_K
+    ) -> List[Tuple[str, float]]:
+        """The k most similar past posts as (url, cosine similarity), best first."""
+        np = lazy_import("numpy")
+        with self._locked():
+            self._refresh()
+            matrix = self.matrix()
+            urls = list(self.index["urls"])
+        if not urls or vector.shape[0] != matrix.shape[1]:
+            return []
+        sims = matrix @ vector
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(urls[i], float(sims[i])) for i in top]
+
+
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = EMBEDDINGS_FILE) -> EmbeddingStore:
+    """The shared EmbeddingStore for path (one per posting history)."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = EmbeddingStore(path)
+        return _stores[path]
+
+
+@timed("novelty")
+def score_novelty(article, store: Optional[EmbeddingStore] = None) -> Optional[float]:
+    """
+    Set an article's novelty against store (default: the main posting
+    history): 1 minus its cosine similarity to the closest past post, 1.0 when
+    there is no history. The article is embedded once and the vector reused
+    for later stores. Returns None when no embedding is available.
+    """
+    vector = article.embedding
+    if vector is None:
+        vector = embed(article.get("full_text", ""))
+        if vector is None:
+            return None
+        article.embedding = vector
+    matches = (store or get_store()).search(vector)
+    novelty = 1.0 - max(0.0, matches[0][1]) if matches else 1.0
+    article["novelty"] = novelty
+    if matches:
+        logger.info(
+            f"Novelty {novelty:.2f} for {article.get('title', '')[:50]}... "
+            f"(closest: {matches[0][0]} at {matches[0][1]:.2f})"
+        )
+    return novelty
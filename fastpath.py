@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from config import (
+    logger,
+    FAST_PATH_ENABLED,
+    FAST_PATH_MIN_PRIORITY,
+    FAST_PATH_KEYWORDS,
+    FAST_PATH_MAX_POSTS_PER_HOUR,
+    FAST_PATH_MAX_AGE_SECONDS,
+    FAST_PATH_TARGET_LATENCY_SECONDS,
+)
+from accounts import Account, is_duplicate_for, load_accounts
+from embeddings import embed
+from jobstore import claim_fast_post, finish_post, get_job_store
+from keywords import KeywordMatcher
+from post_generator import generate_post
+from poster import post_to_x
+from sources import Source
+from metrics import PUBLISH_TO_POST
+
+priority_matcher = KeywordMatcher(FAST_PATH_KEYWORDS)
+
+_lock = threading.Lock()
+_account_locks: Dict[str, threading.Lock] = {}  # account name -> its lock
+# account name -> {link: post time}, when running without a shared job store
+_fast_post_times: Dict[str, Dict[str, float]] = {}
+_handled_links: Set[Tuple[str, str]] = set()  # (account name, link)
+
+# Recent publish-to-post latencies in seconds, per path ("fast" / "batch")
+post_latencies: Dict[str, Deque[float]] = {
+    "fast": deque(maxlen=500),
+    "batch": deque(maxlen=500),
+}
+
+
+def parse_publish_time(value: Optional[str]) -> Optional[float]:
+    """Parse an RSS (RFC 822) or ISO publish date into a UTC timestamp."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def record_post_latency(article: Dict, path: str) -> Optional[float]:
+    """Record and log how long after publication an article was posted."""
+    published = parse_publish_time(article.get("publish_date"))
+    if published is None:
+        return None
+    latency = max(0.0, time.time() - published)
+    post_latencies[path].append(latency)
+    PUBLISH_TO_POST.observe(latency, path=path)
+    samples = sorted(post_latencies[path])
+    logger.info(
+        f"Publish-to-post latency ({path}): {latency:.0f}s "
+        f"(p50 {samples[len(samples) // 2]:.0f}s over {len(samples)} posts)"
+    )
+    return latency
+
+
+def _reserve_slot(account: Account, link: str) -> bool:
+    """Take one of the account's hourly fast-path slots for link."""
+    now = time.time()
+    slots = _fast_post_times.setdefault(account.name, {})
+    for old in [k for k, t in slots.items() if t < now - 3600]:
+        del slots[old]
+    if len(slots) >= FAST_PATH_MAX_POSTS_PER_HOUR:
+        return False
+    slots[link] = now
+    return True
+
+
+def _release_slot(account: Account, link: str):
+    """Give back a slot whose post never went out."""
+    _fast_post_times.get(account.name, {}).pop(link, None)
+
+
+def _claim_slot(account: Account, link: str) -> Optional[bool]:
+    """
+    Claim link for account within its fast-path hourly cap: True if claimed,
+    False if another worker claimed it, None if over the cap. In worker mode
+    the slots are counted in the shared job store, across every process.
+    """
+    if get_job_store() is None:
+        return True if _reserve_slot(account, link) else None
+    return claim_fast_post(account.name, link, FAST_PATH_MAX_POSTS_PER_HOUR)
+
+
+def matches_fast_path(article: Dict, source: Source) -> List[str]:
+    """Priority keywords found in a fresh article from a high-priority source."""
+    if not FAST_PATH_ENABLED or source.priority < FAST_PATH_MIN_PRIORITY:
+        return []
+    published = parse_publish_time(article.get("publish_date"))
+    if published is not None and time.time() - published > FAST_PATH_MAX_AGE_SECONDS:
+        return []
+    return priority_matcher.topics(article.get("title"), article.get("snippet"))
+
+
+def _account_lock(account: Account) -> threading.Lock:
+    with _lock:
+        return _account_locks.setdefault(account.name, threading.Lock())
+
+
+def _post_for_account(article: Dict, account: Account, make_post) -> Optional[str]:
+    """
+    Fast-path one article to one account. Returns "posted" or "duplicate" if
+    the article is handled for this account, None to leave it to the batch.
+    """
+    link = article["link"]
+    key = (account.name, link)
+    history = account.history()
+    if not account.is_active():
+        logger.info(
+            f"Fast path: {account.name} is outside its active hours; "
+            "leaving article to the batch"
+        )
+        return None
+    # One article at a time per account from the duplicate check to the saved
+    # history, so a story arriving from two sources under different links is
+    # posted once
+    with _account_lock(account):
+        if key in _handled_links:
+            return "duplicate"
+        if is_duplicate_for(account, article):
+            _handled_links.add(key)
+            logger.info(
+                f"Fast path [{account.name}]: skipping duplicate {article['title'][:50]}..."
+            )
+            return "duplicate"
+        claimed = _claim_slot(account, link)
+        if claimed is None:
+            logger.info(
+                f"Fast path rate cap reached for {account.name}; leaving article to the batch"
+            )
+            return None
+        if not claimed:  # Another worker is posting the same story
+            _handled_links.add(key)
+            return "duplicate"
+        _handled_links.add(key)
+
+        posted = post_to_x(make_post(), account.x_credentials())
+        finish_post(account.name, link, posted)  # Frees a shared slot on failure
+        if not posted:
+            logger.error(
+                f"Fast path post to {account.name} failed; leaving it to the batch"
+            )
+            _handled_links.discard(key)
+            _release_slot(account, link)
+            return None
+
+        history.save(link, article["full_text"], getattr(article, "embedding", None))
+        # Counts against the account's hourly schedule, like batch posts
+        account.recent_posts.append(time.time())
+        return "posted"
+
+
+def try_fast_path(article: Dict, source: Source) -> bool:
+    """
+    Post a breaking story immediately to every fast-path account interested in
+    it, skipping batch ranking; the post is generated once and shared.
+    Returns True if the article was handled here for all of those accounts
+    (posted or found to be a duplicate), False to leave it to the normal batch.
+    """
+    triggers = matches_fast_path(article, source)
+    if not triggers:
+        return False
+    accounts = [a for a in load_accounts() if a.fast_path and a.wants(article)]
+    if not accounts:
+        return False
+
+    logger.info(f"⚡ Fast path ({', '.join(triggers)}): {article['title'][:50]}...")
+    # Embed (an Ollama call) before the per-account locks; the paraphrase
+    # checks under them reuse the vector
+    if getattr(article, "embedding", None) is None:
+        article.embedding = embed(article["full_text"])
+    generated: List[Dict] = []
+
+    def make_post() -> Dict:
+        if not generated:
+            generated.append(generate_post(article))
+        return generated[0]
+
+    results = [_post_for_account(article, a, make_post) for a in accounts]
+    if "posted" in results:
+        latency = record_post_latency(article, "fast")
+        if latency is not None and latency > FAST_PATH_TARGET_LATENCY_SECONDS:
+            logger.warning(
+                f"Fast path missed its {FAST_PATH_TARGET_LATENCY_SECONDS}s target "
+                f"({latency:.0f}s after publication)"
+            )
+    return None not in results
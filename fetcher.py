@@ -1,117 +1,450 @@
-import feedparser
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article, Config
+import asyncio
+import calendar
 import re
-from typing import List, Dict
-from config import logger, RSS_URLS, SCRAPE_BASE_URLS, KEYWORDS
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+from config import (
+    logger,
+    FAST_EXTRACT_MIN_CHARS,
+    FETCH_BUDGET_SECONDS,
+    FETCH_MAX_WORKERS,
+)
+from keywords import get_matcher
+from http_client import (
+    afetch,
+    afetch_html,
+    fetch,
+    fetch_html,
+    release_html,
+    reset_page_cache,
+)
+from discovery import (
+    canonicalize_url,
+    discover_links,
+    filter_new_links,
+    mark_links_seen,
+    site_of,
+)
+from lazy import lazy_import
+from records import ArticleRecord, CompactText
+from sources import Source
+from metrics import CACHE_HITS, ITEMS, observe_stage
 
+# Extraction results for the current run, keyed by URL (text kept compressed)
+_extracted: Dict[str, Dict] = {}
 
-def fetch_from_rss(rss_urls: List[str]) -> List[Dict]:
-    logger.info("fetching rss feeds...")
+# Per-tier extraction counters for the current run
+extraction_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+# Source name -> what the last poll saw (entry times, new links, seconds taken)
+poll_results: Dict[str, Dict] = {}
+
+
+def reset_fetch_cache():
+    """Start a new run: forget downloaded pages and extraction results."""
+    _extracted.clear()
+    extraction_stats.clear()
+    poll_results.clear()
+    reset_page_cache()
+
+
+def _rss_candidates(source: Source) -> List[Dict]:
+    print(f"Fetching RSS URL: {source.url}")
+    response = fetch(source.url, source.timeout)
+    response.raise_for_status()
+    return _feed_candidates(source, response.content)
+
+
+def _feed_candidates(source: Source, content: bytes) -> List[Dict]:
+    matcher = get_matcher(source.keywords)
+    feed = lazy_import("feedparser").parse(content)
+    print(f"Parsed feed: {source.url}, found {len(feed.entries)} entries")
+    poll_results[source.name]["entry_times"] = [
+        calendar.timegm(entry.published_parsed)
+        for entry in feed.entries
+        if entry.get("published_parsed")
+    ]
     articles = []
-    for url in rss_urls:
-        print(f"Fetching RSS URL: {url}")
-        try:
-            feed = feedparser.parse(url)
-            print(f"Parsed feed: {url}, found {len(feed.entries)} entries")
-            for entry in feed.entries:
-                print(f"Checking entry: {getattr(entry, 'title', 'NO TITLE')}")
-                if any(
-                    kw.lower() in entry.title.lower()
-                    or kw.lower() in entry.summary.lower()
-                    for kw in KEYWORDS
-                ):
-                    print(f"Matched entry with keywords: {entry.title}")
-                    articles.append(
-                        {
-                            "title": entry.title,
-                            "snippet": entry.summary,
-                            "link": entry.link,
-                            "publish_date": entry.get("published"),
-                        }
-                    )
-            logger.info(f"Fetched {len(feed.entries)} entries from {url}")
-        except Exception as e:
-            logger.error(f"Failed to fetch RSS from {url}: {e}")
-            print(f"Exception while fetching RSS from {url}: {e}")
-    print(f"Total articles fetched from RSS: {len(articles)}")
+    links = set()
+    for entry in feed.entries:
+        print(f"Checking entry: {getattr(entry, 'title', 'NO TITLE')}")
+        # Same canonical form as scraped links, so tracking queries (utm_...)
+        # can't make one story look like two
+        link = canonicalize_url(source.url, entry.link) or entry.link
+        if link in links:
+            continue
+        topics = matcher.topics(entry.title, entry.get("summary", ""))
+        if topics:
+            print(f"Matched entry with keywords {topics}: {entry.title}")
+            links.add(link)
+            articles.append(
+                {
+                    "title": entry.title,
+                    "snippet": entry.get("summary", ""),
+                    "link": link,
+                    "publish_date": entry.get("published"),
+                    "topics": topics,
+                }
+            )
+    logger.info(f"Fetched {len(feed.entries)} entries from {source.url}")
     return articles
 
 
-def scrape_articles(base_urls: List[str]) -> List[Dict]:
-    logger.info("fetching from base urls....")
-    articles = []
-    for base_url in base_urls:
-        print(f"Scraping base URL: {base_url}")
+def _scrape_candidates(source: Source) -> List[Dict]:
+    print(f"Scraping base URL: {source.url}")
+    html = fetch_html(source.url, source.timeout)
+    print(f"HTTP GET {source.url} ok")
+    return _homepage_candidates(source, html)
+
+
+def _homepage_candidates(source: Source, html: str) -> List[Dict]:
+    discovered = discover_links(source.url, html, get_matcher(source.keywords))
+    release_html(source.url)
+    links = filter_new_links(site_of(source.url), discovered)
+    print(f"Found {len(discovered)} article links at {source.url}, {len(links)} new")
+    poll_results[source.name]["new_links"] = len(links)
+    return [{"link": link} for link in links]
+
+
+ArticleHook = Callable[[ArticleRecord, Source], bool]
+
+
+def list_candidates(source: Source) -> List[Dict]:
+    """
+    Poll one source's feed or homepage for matching article links without
+    downloading the articles. Resets the source's poll_results entry.
+    """
+    poll_results[source.name] = {"entry_times": [], "new_links": 0, "seconds": 0.0}
+    if source.type == "rss":
+        return _rss_candidates(source)
+    return _scrape_candidates(source)
+
+
+async def alist_candidates(source: Source) -> List[Dict]:
+    """
+    list_candidates() with the download done on the async HTTP client and
+    the feed or homepage parsed in a worker thread.
+    """
+    poll_results[source.name] = {"entry_times": [], "new_links": 0, "seconds": 0.0}
+    if source.type == "rss":
+        print(f"Fetching RSS URL: {source.url}")
+        response = await afetch(source.url, source.timeout)
+        response.raise_for_status()
+        return await asyncio.to_thread(_feed_candidates, source, response.content)
+    print(f"Scraping base URL: {source.url}")
+    html = await afetch_html(source.url, source.timeout)
+    return await asyncio.to_thread(_homepage_candidates, source, html)
+
+
+def extract_candidate(
+    source: Source, candidate: Dict, html: Optional[str] = None
+) -> Optional[ArticleRecord]:
+    """
+    Extract one candidate link into an ArticleRecord, downloading the page
+    unless its html is given.
+    """
+    link = candidate["link"]
+    print(f"Processing link: {link}")
+    article_data = extract_article_content(link, html, timeout=source.timeout)
+    print(f"Extracted article_data for {link}: {article_data.get('success')}")
+    if not article_data["success"]:
+        print(
+            f"Failed to extract article content for {link}: {article_data.get('error')}"
+        )
+        return None
+    return ArticleRecord(
+        link,
+        title=candidate.get("title") or article_data["title"],
+        snippet=candidate.get("snippet") or article_data["summary"],
+        publish_date=candidate.get("publish_date") or article_data["publish_date"],
+        full_text=article_data["text"],
+        topics=candidate.get("topics")
+        or get_matcher(source.keywords).topics(link, article_data["title"]),
+        source=source.name,
+        priority=source.priority,
+    )
+
+
+async def aextract_candidate(
+    source: Source, candidate: Dict
+) -> Optional[ArticleRecord]:
+    """
+    extract_candidate() with the page downloaded on the async HTTP client.
+    Parsing runs in a worker thread so the event loop keeps other downloads
+    moving meanwhile.
+    """
+    link = candidate["link"]
+    try:
+        html = await afetch_html(link, source.timeout)
+    except Exception as e:
+        print(f"Failed to download article {link}: {e}")
+        _extracted[link] = {
+            "success": False,
+            "error": str(e),
+            "url": link,
+            "permanent": _is_permanent(e),
+        }
+        return None
+    return await asyncio.to_thread(extract_candidate, source, candidate, html)
+
+
+def fetch_source(
+    source: Source, deadline: float, on_article: Optional[ArticleHook] = None
+) -> List[ArticleRecord]:
+    """
+    Poll one source and extract its matching articles, at most
+    source.max_concurrency downloads at a time. Articles not started before
+    deadline are left for a later run. on_article is called with each
+    extracted article as soon as it is ready; if it returns True the article
+    is considered handled and left out of the result. Returns articles with
+    full_text.
+    """
+    started = time.monotonic()
+    candidates = list_candidates(source)
+    attempted = []
+
+    def extract(candidate: Dict) -> Optional[ArticleRecord]:
+        if time.monotonic() >= deadline:
+            return None
+        attempted.append(candidate["link"])
+        article = extract_candidate(source, candidate)
+        if article is None:
+            return None
+        if on_article and on_article(article, source):
+            article.release()
+            return None
+        return article
+
+    with ThreadPoolExecutor(max_workers=source.max_concurrency) as pool:
+        articles = [a for a in pool.map(extract, candidates) if a]
+
+    if source.type == "scrape":
+        settled = [link for link in attempted if extraction_settled(link)]
+        mark_links_seen(site_of(source.url), settled)
+    skipped = len(candidates) - len(attempted)
+    if skipped:
+        logger.warning(
+            f"Time budget hit for {source.name}: skipped {skipped} of {len(candidates)} articles"
+        )
+    poll_results[source.name]["seconds"] = time.monotonic() - started
+    observe_stage("fetch", poll_results[source.name]["seconds"])
+    ITEMS.inc(len(articles), stage="fetched")
+    logger.info(f"Got {len(articles)} articles from {source.name}")
+    return articles
+
+
+def fetch_sources(
+    sources: List[Source],
+    budget_seconds: float = FETCH_BUDGET_SECONDS,
+    on_article: Optional[ArticleHook] = None,
+) -> List[ArticleRecord]:
+    """
+    Poll sources highest priority first, FETCH_MAX_WORKERS at a time, within
+    one run's time budget. Each source may spend at most
+    budget * priority / max_priority seconds once started, so slow or
+    low-value sources cannot eat the whole run.
+    """
+    if not sources:
+        return []
+    sources = sorted(sources, key=lambda s: s.priority, reverse=True)
+    run_deadline = time.monotonic() + budget_seconds
+    max_priority = sources[0].priority
+
+    def poll(source: Source) -> List[ArticleRecord]:
+        started = time.monotonic()
+        if started >= run_deadline:
+            logger.warning(f"Fetch budget exhausted; not polling {source.name}")
+            return []
+        allowance = budget_seconds * source.priority / max_priority
         try:
-            response = requests.get(base_url, headers={"User-Agent": "Mozilla/5.0"})
-            print(f"HTTP GET {base_url} status: {response.status_code}")
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            links = [
-                a["href"]
-                for a in soup.find_all("a", href=True)
-                if any(kw.lower() in a["href"].lower() for kw in KEYWORDS)
-            ]
-            print(f"Found {len(links)} links matching keywords at {base_url}")
-            for link in set(links):  # Dedup links
-                print(f"Processing link: {link}")
-                if not link.startswith("http"):
-                    link = base_url.rstrip("/") + "/" + link.lstrip("/")
-                    print(f"Normalized link to: {link}")
-                article_data = extract_article_content(link)
-                print(
-                    f"Extracted article_data for {link}: {article_data.get('success')}"
-                )
-                if article_data["success"]:
-                    articles.append(
-                        {
-                            "title": article_data["title"],
-                            "snippet": article_data["summary"],
-                            "link": link,
-                            "publish_date": article_data["publish_date"],
-                            "full_text": article_data["text"],
-                        }
-                    )
-                else:
-                    print(
-                        f"Failed to extract article content for {link}: {article_data.get('error')}"
-                    )
-            logger.info(f"Scraped {len(links)} potential articles from {base_url}")
+            return fetch_source(
+                source, min(run_deadline, started + allowance), on_article
+            )
         except Exception as e:
-            logger.error(f"Failed to scrape {base_url}: {e}")
-            print(f"Exception while scraping {base_url}: {e}")
-    print(f"Total articles scraped: {len(articles)}")
+            logger.error(f"Failed to fetch {source.name} ({source.url}): {e}")
+            print(f"Exception while fetching {source.url}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS) as pool:
+        results = list(pool.map(poll, sources))
+    articles = [article for result in results for article in result]
+    print(f"Total articles fetched: {len(articles)}")
     return articles
 
 
-def extract_article_content(url: str) -> Dict:
+def fetch_from_rss(rss_urls: List[str]) -> List[ArticleRecord]:
+    logger.info("fetching rss feeds...")
+    return fetch_sources([Source(name=url, type="rss", url=url) for url in rss_urls])
+
+
+def scrape_articles(base_urls: List[str]) -> List[ArticleRecord]:
+    logger.info("fetching from base urls....")
+    return fetch_sources(
+        [Source(name=url, type="scrape", url=url) for url in base_urls]
+    )
+
+
+def _record_tier(tier: str, wall_start: float, cpu_start: float):
+    wall = time.perf_counter() - wall_start
+    cpu = time.thread_time() - cpu_start
+    with _stats_lock:
+        stats = extraction_stats.setdefault(
+            tier, {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+        )
+        stats["count"] += 1
+        stats["wall_seconds"] += wall
+        stats["cpu_seconds"] += cpu
+    observe_stage(f"extract_{tier}", wall, cpu)
+
+
+def log_extraction_stats():
+    """Log per-tier extraction counts and time spent during this run."""
+    for tier, stats in extraction_stats.items():
+        count = stats["count"] or 1
+        logger.info(
+            f"Extraction tier '{tier}': {stats['count']} articles, "
+            f"{stats['wall_seconds']:.2f}s wall, {stats['cpu_seconds']:.2f}s CPU "
+            f"({stats['cpu_seconds'] / count * 1000:.1f}ms CPU/article)"
+        )
+
+
+def _fast_extract(html: str) -> Optional[Dict]:
+    """
+    Lightweight tier: title, publish date and paragraph text straight from the
+    lxml tree. Returns None when the page doesn't look like a regular article.
+    """
+    tree = lazy_import("lxml.html").fromstring(html)
+    title = (
+        tree.xpath("string(//meta[@property='og:title']/@content)")
+        or tree.xpath("string(//title)")
+    ).strip()
+    publish_date = (
+        tree.xpath("string(//meta[@property='article:published_time']/@content)")
+        or tree.xpath("string(//time/@datetime)")
+        or None
+    )
+    containers = tree.xpath("//article") or [tree]
+    paragraphs = [p.text_content() for p in containers[0].iter("p")]
+    text = re.sub(r"\s+", " ", " ".join(paragraphs)).strip()
+    if not title or len(text) < FAST_EXTRACT_MIN_CHARS:
+        return None
+    return {"title": title, "text": text, "publish_date": publish_date}
+
+
+def _newspaper_extract(url: str, html: str) -> Dict:
+    """Full newspaper parse, used when the fast tier can't find the article body."""
+    newspaper = lazy_import("newspaper")
+    config = newspaper.Config()
+    config.browser_user_agent = "Mozilla/5.0"
+    config.fetch_images = False
+
+    article = newspaper.Article(url, config=config)
+    article.download(input_html=html)
+    article.parse()
+    return {
+        "title": article.title,
+        "text": re.sub(r"\s+", " ", article.text).strip(),
+        "publish_date": str(article.publish_date) if article.publish_date else None,
+    }
+
+
+def _is_permanent(error: Exception) -> bool:
+    """A 4xx response other than 408/429, which retrying the link won't fix."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def extraction_settled(url: str) -> bool:
+    """
+    True if url was extracted this run or failed permanently. Only these
+    links are remembered as seen; timeouts, 5xx responses and parse errors
+    are retried on the next poll.
+    """
+    result = _extracted.get(url)
+    return bool(result) and (result["success"] or result.get("permanent", False))
+
+
+def extract_article_content(
+    url: str, html: Optional[str] = None, timeout: Optional[float] = None
+) -> Dict:
+    """
+    Extract title and main text from an article, cheapest tier first.
+    Uses html when given, otherwise downloads the page through the shared
+    session. The NLP summary is not computed here; call summarize_text() for
+    articles that survive dedupe. Results are memoized for the rest of the run.
+    """
+    if url in _extracted:
+        CACHE_HITS.inc(cache="extraction")
+        cached = _extracted[url]
+        if "text" in cached:
+            return {**cached, "text": str(cached["text"])}
+        return cached
     print(f"Extracting article content from: {url}")
     try:
-        config = Config()
-        config.browser_user_agent = "Mozilla/5.0"
-        config.request_timeout = 10
-
-        article = Article(url, config=config)
-        print(f"Downloading article: {url}")
-        article.download()
-        print(f"Parsing article: {url}")
-        article.parse()
-        print(f"Running NLP on article: {url}")
-        article.nlp()
-
-        clean_text = re.sub(r"\s+", " ", article.text).strip()
-        print(f"Extracted text length: {len(clean_text)} for {url}")
-
-        return {
-            "title": article.title,
-            "text": clean_text,
-            "summary": article.summary,
-            "publish_date": str(article.publish_date) if article.publish_date else None,
+        if html is None:
+            print(f"Downloading article: {url}")
+            html = fetch_html(url, timeout)
+
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            data = _fast_extract(html)
+        except Exception as e:
+            # e.g. lxml rejects str input with an <?xml encoding=...?> header;
+            # newspaper copes with such pages
+            print(f"Fast extraction failed for {url}: {e}")
+            data = None
+        _record_tier("fast", wall_start, cpu_start)
+        tier = "fast"
+        if data is None:
+            print(f"Fast extraction insufficient, parsing with newspaper: {url}")
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+            data = _newspaper_extract(url, html)
+            _record_tier("newspaper", wall_start, cpu_start)
+            tier = "newspaper"
+        release_html(url)
+        print(f"Extracted text length: {len(data['text'])} for {url} ({tier})")
+
+        result = {
+            "title": data["title"],
+            "text": data["text"],
+            "summary": None,
+            "publish_date": data["publish_date"],
             "url": url,
+            "tier": tier,
             "success": True,
         }
     except Exception as e:
         print(f"Exception in extract_article_content for {url}: {e}")
-        return {"success": False, "error": str(e), "url": url}
+        result = {
+            "success": False,
+            "error": str(e),
+            "url": url,
+            "permanent": _is_permanent(e),
+        }
+    if result["success"]:
+        _extracted[url] = {**result, "text": CompactText(result["text"])}
+    else:
+        _extracted[url] = result
+    return result
+
+
+def summarize_text(title: str, text: str, url: str = "") -> str:
+    """
+    Lazy NLP tier: newspaper's extractive summary for an extracted article,
+    used when the LLM summary is unavailable.
+    """
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        newspaper = lazy_import("newspaper")
+        nlp = lazy_import("newspaper.nlp")
+        nlp.load_stopwords(newspaper.Config().get_language())
+        sentences = nlp.summarize(url=url, title=title, text=text, max_sents=5)
+        return "\n".join(sentences)
+    except Exception as e:
+        logger.error(f"NLP summary failed for {url}: {e}")
+        return text[:200]
+    finally:
+        _record_tier("nlp", wall_start, cpu_start)
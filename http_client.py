@@ -0,0 +1,187 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from config import (
+    logger,
+    ASYNC_MAX_CONNECTIONS,
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT_SECONDS,
+)
+from lazy import lazy_import
+from metrics import CACHE_HITS
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+# Async counterpart used by the asyncio pipeline (async_pipeline.py); it
+# belongs to that pipeline's event loop
+_async_client: Optional["httpx.AsyncClient"] = None
+
+# Per-run page cache: url -> (status_code, html). html is dropped once parsed.
+_pages: Dict[str, Tuple[int, Optional[str]]] = {}
+_pages_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Return the process-wide pooled session used by every fetch path."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                requests = lazy_import("requests")
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(HEADERS)
+                _session = session
+    return _session
+
+
+def reset_page_cache():
+    """Forget pages fetched during the previous run."""
+    with _pages_lock:
+        _pages.clear()
+
+
+def fetch(url: str, timeout: Optional[float] = None) -> "requests.Response":
+    """GET url through the shared session and record its status for this run."""
+    response = get_session().get(url, timeout=timeout or HTTP_TIMEOUT_SECONDS)
+    with _pages_lock:
+        _pages[url] = (response.status_code, None)
+    return response
+
+
+def fetch_html(url: str, timeout: Optional[float] = None) -> str:
+    """
+    Return the HTML for url, downloading it at most once per run.
+    Raises requests.HTTPError for non-2xx responses.
+    """
+    with _pages_lock:
+        cached = _pages.get(url)
+    if cached and cached[1] is not None:
+        CACHE_HITS.inc(cache="page")
+        return cached[1]
+
+    response = fetch(url, timeout)
+    response.raise_for_status()
+    with _pages_lock:
+        _pages[url] = (response.status_code, response.text)
+    return response.text
+
+
+def release_html(url: str):
+    """Drop cached HTML for url but remember that it was fetched."""
+    with _pages_lock:
+        if url in _pages:
+            _pages[url] = (_pages[url][0], None)
+
+
+def is_reachable(url: str, timeout: Optional[float] = None) -> bool:
+    """True if url answers 200, reusing this run's fetch result when available."""
+    with _pages_lock:
+        cached = _pages.get(url)
+    if cached:
+        CACHE_HITS.inc(cache="link_check")
+        return cached[0] == 200
+    try:
+        session = get_session()
+        response = session.head(
+            url, timeout=timeout or HTTP_TIMEOUT_SECONDS, allow_redirects=True
+        )
+        if response.status_code == 405:
+            # Some sites reject HEAD; fall back to a GET without reading the body
+            response = session.get(
+                url, timeout=timeout or HTTP_TIMEOUT_SECONDS, stream=True
+            )
+            response.close()
+        with _pages_lock:
+            _pages[url] = (response.status_code, None)
+        return response.status_code == 200
+    except Exception as e:
+        logger.warning(f"Link check failed for {url}: {e}")
+        return False
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Return the pooled httpx client for the running event loop."""
+    global _async_client
+    if _async_client is None:
+        httpx = lazy_import("httpx")
+        _async_client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+            ),
+        )
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def afetch(url: str, timeout: Optional[float] = None) -> "httpx.Response":
+    """Async fetch(): GET url and record its status for this run."""
+    response = await get_async_client().get(
+        url, timeout=timeout or HTTP_TIMEOUT_SECONDS
+    )
+    with _pages_lock:
+        _pages[url] = (response.status_code, None)
+    return response
+
+
+async def afetch_html(url: str, timeout: Optional[float] = None) -> str:
+    """Async fetch_html(), sharing the same per-run page cache."""
+    with _pages_lock:
+        cached = _pages.get(url)
+    if cached and cached[1] is not None:
+        CACHE_HITS.inc(cache="page")
+        return cached[1]
+
+    response = await afetch(url, timeout)
+    response.raise_for_status()
+    with _pages_lock:
+        _pages[url] = (response.status_code, response.text)
+    return response.text
+
+
+async def ais_reachable(url: str, timeout: Optional[float] = None) -> bool:
+    """Async is_reachable(); the result is cached so is_reachable() reuses it."""
+    with _pages_lock:
+        cached = _pages.get(url)
+    if cached:
+        CACHE_HITS.inc(cache="link_check")
+        return cached[0] == 200
+    client = get_async_client()
+    try:
+        response = await client.head(url, timeout=timeout or HTTP_TIMEOUT_SECONDS)
+        if response.status_code == 405:
+            # Some sites reject HEAD; fall back to a GET without reading the body
+            async with client.stream(
+                "GET", url, timeout=timeout or HTTP_TIMEOUT_SECONDS
+            ) as streamed:
+                response = streamed
+        with _pages_lock:
+            _pages[url] = (response.status_code, None)
+        return response.status_code == 200
+    except Exception as e:
+        logger.warning(f"Link check failed for {url}: {e}")
+        return False
@@ -1,10 +1,12 @@
 import os
 import random
 from config import IMAGE_FOLDER, KEYWORDS
+from keywords import get_matcher
 
 
 def pick_image(keywords: list[str] = ["crypto"]) -> str | None:
-    for kw in keywords:
+    # Aliases such as "BTC" or "NFTs" share their topic's image folder
+    for kw in get_matcher().canonical(keywords) or keywords:
         image_subfolder = os.path.join(IMAGE_FOLDER, kw.lower())
         if os.path.exists(image_subfolder):
             images = [
@@ -0,0 +1,333 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from config import (
+    logger,
+    WORKER_MODE,
+    WORKER_ID,
+    JOB_STORE_PATH,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    HISTORY_RETENTION_DAYS,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 5,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (kind, status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS post_claims (
+    account TEXT NOT NULL,
+    link TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    claimed_at REAL NOT NULL,
+    PRIMARY KEY (account, link)
+);
+CREATE TABLE IF NOT EXISTS fast_posts (
+    account TEXT NOT NULL,
+    link TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    PRIMARY KEY (account, link)
+);
+"""
+
+# Job statuses: pending -> leased -> done -> consumed, or failed after
+# JOB_MAX_ATTEMPTS leases. Post claims: claimed -> posted, or failed (which
+# may be claimed again). fast_posts holds the fast path's hourly slots; a
+# failed post gives its slot back.
+
+
+class Job(NamedTuple):
+    id: int
+    kind: str
+    payload: Dict
+    attempts: int
+
+
+def default_owner() -> str:
+    return WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    """
+    SQLite-backed coordination between pipeline processes, possibly on
+    several hosts sharing the database file:
+
+    - jobs are leased to one worker at a time; a lease that runs out (the
+      worker died) makes the job available again
+    - named leases elect a single leader, e.g. for the scheduler
+    - posts are claimed per (account, link) before they are sent, so a story
+      is posted at most once per account even if several processes pick it
+    - fast-path posts also take one of the account's hourly slots, so the
+      fast path's rate cap holds across every process
+
+    Every change runs in its own BEGIN IMMEDIATE transaction, which takes
+    SQLite's write lock up front and makes each check-and-set atomic.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, owner: str = ""):
+        self.path = path
+        self.owner = owner or default_owner()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, key: str, payload: Dict, priority: int = 5) -> bool:
+        """Add a job unless one with the same key already exists."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs "
+                "(key, kind, payload, priority, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), priority, now, now),
+            )
+            return cursor.rowcount == 1
+
+    def lease(
+        self, kind: str, lease_seconds: float = JOB_LEASE_SECONDS
+    ) -> Optional[Job]:
+        """Lease the highest-priority available job of kind, if any."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', "
+                "updated_at = ? WHERE kind = ? AND status = 'leased' "
+                "AND lease_expires < ? AND attempts >= ?",
+                (now, kind, now, JOB_MAX_ATTEMPTS),
+            )
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE kind = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "AND attempts < ? ORDER BY priority DESC, id LIMIT 1",
+                (kind, now, JOB_MAX_ATTEMPTS),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (self.owner, now + lease_seconds, now, job_id),
+            )
+        return Job(job_id, kind, json.loads(payload), attempts + 1)
+
+    def complete(self, job: Job, result: Dict) -> bool:
+        """Store a leased job's result. False if the lease was lost meanwhile."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (json.dumps(result), time.time(), job.id, self.owner),
+            )
+        if cursor.rowcount != 1:
+            logger.warning(f"Lost the lease on job {job.id} before completing it")
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str):
+        """Return a leased job for a retry, or fail it after JOB_MAX_ATTEMPTS."""
+        status = "failed" if job.attempts >= JOB_MAX_ATTEMPTS else "pending"
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (status, error[:500], time.time(), job.id, self.owner),
+            )
+
+    def done_results(self, kind: str) -> List[Tuple[int, Dict]]:
+        """(job id, result) of finished jobs of kind not consumed yet, oldest first."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, result FROM jobs WHERE kind = ? AND status = 'done' "
+                "ORDER BY id",
+                (kind,),
+            ).fetchall()
+        return [(job_id, json.loads(result)) for job_id, result in rows]
+
+    def consume(self, job_ids: List[int]):
+        """Mark finished jobs' results as used, once they have been acted on."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET status = 'consumed', updated_at = ? "
+                "WHERE id = ? AND status = 'done'",
+                [(time.time(), job_id) for job_id in job_ids],
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs by status."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def acquire_lease(self, name: str, ttl: float) -> bool:
+        """Take or renew the named lease; True while this process holds it."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, self.owner, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, name: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner)
+            )
+
+    def _claim(self, conn: sqlite3.Connection, account: str, link: str) -> bool:
+        cursor = conn.execute(
+            "INSERT INTO post_claims (account, link, owner, status, claimed_at) "
+            "VALUES (?, ?, ?, 'claimed', ?) "
+            "ON CONFLICT (account, link) DO UPDATE SET owner = excluded.owner, "
+            "status = 'claimed', claimed_at = excluded.claimed_at "
+            "WHERE post_claims.status = 'failed'",
+            (account, link, self.owner, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def claim_post(self, account: str, link: str) -> bool:
+        """
+        Atomically claim the right to post link to account. Only one caller
+        ever gets True, unless a previous claim was released as failed.
+        """
+        with self._transaction() as conn:
+            return self._claim(conn, account, link)
+
+    def claim_fast_post(
+        self, account: str, link: str, max_per_hour: int
+    ) -> Optional[bool]:
+        """
+        claim_post() for the fast path, within its hourly cap for account:
+        True if claimed, False if claimed elsewhere, None if over the cap.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            (taken,) = conn.execute(
+                "SELECT COUNT(*) FROM fast_posts WHERE account = ? AND taken_at > ?",
+                (account, now - 3600),
+            ).fetchone()
+            if taken >= max_per_hour:
+                return None
+            if not self._claim(conn, account, link):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO fast_posts (account, link, taken_at) "
+                "VALUES (?, ?, ?)",
+                (account, link, now),
+            )
+            return True
+
+    def finish_post(self, account: str, link: str, posted: bool):
+        """
+        Record a claimed post as sent, or release the claim (and any fast-path
+        slot) if it failed.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE post_claims SET status = ? "
+                "WHERE account = ? AND link = ? AND owner = ?",
+                ("posted" if posted else "failed", account, link, self.owner),
+            )
+            if not posted:
+                conn.execute(
+                    "DELETE FROM fast_posts WHERE account = ? AND link = ?",
+                    (account, link),
+                )
+
+    def purge(self, retention_days: float = HISTORY_RETENTION_DAYS):
+        """Forget finished jobs and post claims older than the history window."""
+        cutoff = time.time() - retention_days * 86400
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('consumed', 'failed') "
+                "AND updated_at < ?",
+                (cutoff,),
+            )
+            conn.execute("DELETE FROM post_claims WHERE claimed_at < ?", (cutoff,))
+            conn.execute(
+                "DELETE FROM fast_posts WHERE taken_at < ?", (time.time() - 3600,)
+            )
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> Optional[JobStore]:
+    """The shared job store in worker mode, None when running standalone."""
+    global _store
+    if not WORKER_MODE:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
+
+
+def claim_post(account: str, link: str) -> bool:
+    """Claim a post before sending it; always granted outside worker mode."""
+    store = get_job_store()
+    return store.claim_post(account, link) if store else True
+
+
+def claim_fast_post(account: str, link: str, max_per_hour: int) -> Optional[bool]:
+    """
+    Fast-path claim within the shared hourly cap in worker mode; outside it
+    the fast path keeps its own count, so this always claims.
+    """
+    store = get_job_store()
+    return store.claim_fast_post(account, link, max_per_hour) if store else True
+
+
+def finish_post(account: str, link: str, posted: bool):
+    store = get_job_store()
+    if store:
+        store.finish_post(account, link, posted)
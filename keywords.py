@@ -0,0 +1,88 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from config import KEYWORDS, KEYWORD_ALIASES
+
+_SEPARATORS = re.compile(r"[\s\-]+")
+
+
+class TopicMatch(NamedTuple):
+    topic: str
+    start: int
+    end: int
+
+
+def _normalize(term: str) -> str:
+    return _SEPARATORS.sub(" ", term.strip().lower())
+
+
+class KeywordMatcher:
+    """
+    Precompiled matcher over a keyword list and its aliases.
+
+    Every keyword and alias is folded into a single compiled regex, so a text is
+    scanned once no matter how many keywords there are. Matches must sit on word
+    boundaries ("eth" matches "ETH price" but not "method").
+    """
+
+    def __init__(
+        self,
+        keywords: Sequence[str],
+        aliases: Optional[Dict[str, Sequence[str]]] = None,
+    ):
+        self.keywords = [kw.lower() for kw in keywords]
+        self._term_to_topic: Dict[str, str] = {}
+        for kw in self.keywords:
+            self._term_to_topic.setdefault(_normalize(kw), kw)
+            for alias in (aliases or {}).get(kw, []):
+                self._term_to_topic.setdefault(_normalize(alias), kw)
+
+        # Longest terms first so "web 3.0" wins over "web 3"
+        terms = sorted(self._term_to_topic, key=len, reverse=True)
+        alternation = "|".join(
+            r"[\s\-]+".join(re.escape(part) for part in term.split(" "))
+            for term in terms
+        )
+        self._pattern = re.compile(
+            rf"(?<![A-Za-z0-9])(?:{alternation})(?![A-Za-z0-9])", re.IGNORECASE
+        )
+
+    def finditer(self, text: str) -> List[TopicMatch]:
+        """Return every topic occurrence in text with its position."""
+        if not text:
+            return []
+        return [
+            TopicMatch(self._term_to_topic[_normalize(m.group(0))], m.start(), m.end())
+            for m in self._pattern.finditer(text)
+        ]
+
+    def topics(self, *texts: Optional[str]) -> List[str]:
+        """Return matched topics across texts, unique, in first-seen order."""
+        found: Dict[str, None] = {}
+        for text in texts:
+            for match in self.finditer(text or ""):
+                found.setdefault(match.topic, None)
+        return list(found)
+
+    def matches(self, *texts: Optional[str]) -> bool:
+        """True if any text mentions any topic."""
+        return any(text and self._pattern.search(text) for text in texts)
+
+    def canonical(self, terms: Iterable[str]) -> List[str]:
+        """Map keywords or aliases (e.g. "BTC") to their topic names."""
+        found: Dict[str, None] = {}
+        for term in terms:
+            topic = self._term_to_topic.get(_normalize(term))
+            if topic:
+                found.setdefault(topic, None)
+        return list(found)
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords, KEYWORD_ALIASES)
+
+
+def get_matcher(keywords: Optional[Sequence[str]] = None) -> KeywordMatcher:
+    """Return a shared matcher for keywords (defaults to config.KEYWORDS)."""
+    return _cached_matcher(tuple(keywords or KEYWORDS))
@@ -0,0 +1,34 @@
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+from config import logger
+from metrics import IMPORT_SECONDS
+
+# module name -> seconds its first import took in this process
+import_times: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a heavy dependency on first use and record how long that took.
+    Later calls return the already-imported module.
+
+    Always goes through importlib.import_module, which waits on the module's
+    import lock, so a thread never gets a module another thread is still
+    initializing (sys.modules holds it before it finishes loading).
+    """
+    if name in import_times:
+        return importlib.import_module(name)
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    with _lock:
+        if name in import_times:
+            return module
+        import_times[name] = elapsed
+    IMPORT_SECONDS.set(elapsed, module=name)
+    logger.info(f"Loaded {name} in {elapsed * 1000:.0f}ms")
+    return module
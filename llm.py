@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from config import (
+    logger,
+    EMBEDDING_MODEL,
+    LLM_BREAKER_COOLDOWN_SECONDS,
+    LLM_BREAKER_FAILURES,
+    LLM_DEFAULT_TIMEOUT_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MODEL_TIERS,
+    LLM_TASK_TIERS,
+    LLM_TASK_TIMEOUTS,
+)
+from lazy import lazy_import
+from metrics import (
+    LLM_CALLS,
+    LLM_CIRCUIT_OPEN,
+    LLM_PROMPT_TOKENS,
+    LLM_SECONDS,
+    record_llm_usage,
+)
+from prompts import estimate_tokens
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a model after `failures` consecutive failures. Once
+    `cooldown` seconds have passed, a single trial call is let through: a
+    success closes the breaker and a failure keeps it open for another
+    cooldown.
+    """
+
+    def __init__(self, name: str, failures: int, cooldown: float):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def cooling_down(self) -> bool:
+        """True while calls are refused outright (open and within cooldown)."""
+        opened_at = self.opened_at
+        return opened_at is not None and time.monotonic() - opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            # Half-open: let this call through, hold the rest off until it ends
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"LLM circuit for {self.name} closed")
+            self.consecutive_failures = 0
+            self.opened_at = None
+        LLM_CIRCUIT_OPEN.set(0, model=self.name)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures < self.failures:
+                return
+            if self.opened_at is None:
+                logger.warning(
+                    f"LLM circuit for {self.name} opened after "
+                    f"{self.consecutive_failures} failures; skipping calls for "
+                    f"{self.cooldown:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+        LLM_CIRCUIT_OPEN.set(1, model=self.name)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_clients: Dict[Tuple[str, float, float], object] = {}
+_embedders: Dict[Tuple[str, float], object] = {}
+_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def model_for(task: str) -> str:
+    """The model a task is routed to through its tier."""
+    tier = LLM_TASK_TIERS.get(task, "default")
+    return LLM_MODEL_TIERS.get(tier) or LLM_MODEL_TIERS["default"]
+
+
+def timeout_for(task: str) -> float:
+    return LLM_TASK_TIMEOUTS.get(task, LLM_DEFAULT_TIMEOUT_SECONDS)
+
+
+def breaker_for(model: str) -> CircuitBreaker:
+    with _lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(
+                model, LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_SECONDS
+            )
+        return _breakers[model]
+
+
+def get_chat_model(model: str, temperature: float, timeout: float):
+    """A shared ChatOllama client whose HTTP requests give up after timeout."""
+    key = (model, temperature, timeout)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = lazy_import("langchain_ollama").ChatOllama(
+                model=model,
+                temperature=temperature,
+                client_kwargs={"timeout": timeout},
+            )
+        return _clients[key]
+
+
+def get_embedder(model: str, timeout: float):
+    """A shared OllamaEmbeddings client whose HTTP requests give up after timeout."""
+    key = (model, timeout)
+    with _lock:
+        if key not in _embedders:
+            _embedders[key] = lazy_import("langchain_ollama").OllamaEmbeddings(
+                model=model, client_kwargs={"timeout": timeout}
+            )
+        return _embedders[key]
+
+
+def _within(fn: Callable[[], T], timeout: float) -> T:
+    """
+    Run fn on a daemon thread and wait at most timeout seconds for it. The
+    clients' HTTP timeout only bounds the gap between streamed chunks, so a
+    slow but live model would otherwise never be cut off; an abandoned call
+    finishes in the background.
+    """
+    outcome: Dict[str, object] = {}
+
+    def run():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True, name="llm-call")
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"LLM call exceeded its {timeout:g}s budget")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+class _Call:
+    """Governor bookkeeping for one model call, shared by invoke, ainvoke and embed."""
+
+    def __init__(self, task: str, prompt: str, model: Optional[str] = None):
+        self.task = task
+        self.model = model or model_for(task)
+        self.breaker = breaker_for(self.model)
+        if not self.breaker.allow():
+            LLM_CALLS.inc(task=task, model=self.model, status="skipped")
+            raise CircuitOpenError(f"LLM circuit for {self.model} is open")
+        self.timeout = timeout_for(task)
+        self.estimated = estimate_tokens(prompt)
+        LLM_PROMPT_TOKENS.observe(self.estimated, task=task)
+        self.started = time.perf_counter()
+
+    def failed(self, error: Exception):
+        elapsed = time.perf_counter() - self.started
+        status = "timeout" if "timeout" in type(error).__name__.lower() else "error"
+        LLM_CALLS.inc(task=self.task, model=self.model, status=status)
+        LLM_SECONDS.observe(elapsed, task=self.task, model=self.model)
+        self.breaker.record_failure()
+
+    def ok(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        LLM_CALLS.inc(task=self.task, model=self.model, status="ok")
+        LLM_SECONDS.observe(elapsed, task=self.task, model=self.model)
+        self.breaker.record_success()
+        return elapsed
+
+    def succeeded(self, response):
+        elapsed = self.ok()
+        # Ollama counts only the prompt tokens it had to evaluate, so a count
+        # well below the estimate means the cached prompt prefix was reused
+        evaluated, completion = record_llm_usage(self.task, response)
+        logger.info(
+            f"LLM {self.task} on {self.model}: ~{self.estimated} prompt tokens "
+            f"({evaluated if evaluated is not None else '?'} evaluated), "
+            f"{completion if completion is not None else '?'} completion, "
+            f"{elapsed:.1f}s"
+        )
+        return response
+
+
+def invoke(task: str, prompt: str, temperature: float = 0.3):
+    """
+    Run prompt for task on the task's model within its latency budget.
+
+    Raises CircuitOpenError without calling the model while its breaker is
+    open, and re-raises call failures (including TimeoutError once the whole
+    call exceeds its budget) after counting them against the breaker, so
+    callers handle both with their fallbacks.
+    """
+    call = _Call(task, prompt)
+    client = get_chat_model(call.model, temperature, call.timeout)
+    try:
+        response = _within(lambda: client.invoke(prompt), call.timeout)
+    except Exception as e:
+        call.failed(e)
+        raise
+    return call.succeeded(response)
+
+
+_slots: Optional[asyncio.Semaphore] = None
+
+
+async def ainvoke(task: str, prompt: str, temperature: float = 0.3):
+    """
+    Async invoke(), for the asyncio pipeline. At most LLM_MAX_CONCURRENCY
+    calls run at once; the rest wait their turn before their latency budget
+    starts, so a queue of summaries does not time out behind a slow one.
+    """
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    model = model_for(task)
+    if breaker_for(model).cooling_down():  # Fail fast rather than after queueing
+        LLM_CALLS.inc(task=task, model=model, status="skipped")
+        raise CircuitOpenError(f"LLM circuit for {model} is open")
+    async with _slots:
+        call = _Call(task, prompt)
+        client = get_chat_model(call.model, temperature, call.timeout)
+        try:
+            async with asyncio.timeout(call.timeout):
+                response = await client.ainvoke(prompt)
+        except Exception as e:
+            call.failed(e)
+            raise
+    return call.succeeded(response)
+
+
+def embed_query(text: str) -> List[float]:
+    """
+    Embed text with EMBEDDING_MODEL under the governor, as the "embed" task:
+    same breaker, latency budget and metrics as invoke().
+    """
+    call = _Call("embed", text, model=EMBEDDING_MODEL)
+    client = get_embedder(call.model, call.timeout)
+    try:
+        vector = _within(lambda: client.embed_query(text), call.timeout)
+    except Exception as e:
+        call.failed(e)
+        raise
+    call.ok()
+    return vector
@@ -1,27 +1,73 @@
+import os
 import queue
+import sys
 import time
+
+STARTED = time.perf_counter()  # before the pipeline imports below
+
 import random
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
-from config import logger, POST_QUEUE_SIZE, RSS_URLS, SCRAPE_BASE_URLS
-from fetcher import fetch_from_rss, scrape_articles, extract_article_content
-from deduper import is_duplicate, save_posted
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from typing import Callable, Dict, List, Optional, Tuple
+from config import (
+    logger,
+    POST_QUEUE_SIZE,
+    POLL_TICK_SECONDS,
+    WORKER_MODE,
+    ASYNC_PIPELINE,
+)
+from fetcher import (
+    fetch_sources,
+    extract_article_content,
+    log_extraction_stats,
+    poll_results,
+    reset_fetch_cache,
+    summarize_text,
+)
+from accounts import Account, is_duplicate_for, load_accounts
+from embeddings import score_novelty
+from jobstore import claim_post, finish_post
 from ranker import Rank_News_Items
 from summarizer import summarize_article
 from post_generator import (
     generate_post,
 )  # Assumes this returns {"text": ..., "image_path": ..., "recommended_delay": ...}
 from poster import post_to_x
+from records import ArticleRecord
+from sources import load_sources
+from polling import AdaptivePoller
+from metrics import ITEMS, LAST_RUN, RETRIES, STARTUP_SECONDS, stage_timer
+from lazy import import_times
+from profiling import maybe_profile
+from fastpath import try_fast_path, record_post_latency
+
+# Articles awaiting ranking, per account name
+article_queues: Dict[str, queue.Queue] = {}
+
+poller = AdaptivePoller()
+
 
-# Queues
-article_queue = queue.Queue(maxsize=POST_QUEUE_SIZE)  # Queue for articles to process
-post_queue = queue.Queue(maxsize=POST_QUEUE_SIZE)  # Queue for ready posts
+def queue_article(account: Account, article: ArticleRecord):
+    """Queue an article for ranking, dropping the oldest one if the queue is full."""
+    article_queue = article_queues.setdefault(
+        account.name, queue.Queue(maxsize=POST_QUEUE_SIZE)
+    )
+    try:
+        article_queue.put_nowait(article)
+    except queue.Full:
+        dropped = article_queue.get_nowait()
+        logger.warning(
+            f"[{account.name}] Article queue full; dropped: {dropped.get('title', '')[:50]}"
+        )
+        article_queue.put_nowait(article)
 
 
-def post_to_x_with_retry(post: dict, max_retries: int = 2) -> bool:
+def post_to_x_with_retry(
+    post: dict, max_retries: int = 2, credentials: Optional[dict] = None
+) -> bool:
     """Wrapper for post_to_x with retries on 403 errors."""
     for attempt in range(max_retries + 1):
-        success = post_to_x(post)
+        success = post_to_x(post, credentials)
         if success:
             return True
         if attempt < max_retries:
@@ -30,134 +76,342 @@ def post_to_x_with_retry(post: dict, max_retries: int = 2) -> bool:
             logger.warning(
                 f"Post attempt {attempt + 1} failed (likely 403 spam flag). Retrying in {retry_delay:.0f}s..."
             )
+            RETRIES.inc()
             time.sleep(retry_delay)
     logger.error("All post retries failed.")
     return False
 
 
 def pipeline_job():
-    logger.info("Running pipeline job...")
+    # Only run when the poller says some sources are due
+    sources = poller.due(load_sources())
+    if not sources:
+        return
+    logger.info(f"Running pipeline job for {len(sources)} due sources...")
+    run_stats = {"sources": len(sources), "fetched": 0, "queued": 0, "posted": 0}
+    started = time.time()
+    try:
+        with maybe_profile(), stage_timer("pipeline"):
+            run_pipeline(sources, run_stats)
+    finally:
+        LAST_RUN.set(started, field="timestamp")
+        LAST_RUN.set(time.time() - started, field="duration_seconds")
+        for field, value in run_stats.items():
+            LAST_RUN.set(value, field=field)
+
+
+def prepare_article(article: ArticleRecord, accounts: List[Account]) -> List[Account]:
+    """
+    Dedupe an article for every account, then summarize it once if any
+    account still wants it. Returns the interested accounts (the article's
+    text is released when there are none).
+    """
+    interested = interested_accounts(article, accounts)
+    if interested and needs_summary(article):
+        article["snippet"] = summarize_article(
+            article["full_text"], fallback=nlp_summary(article)
+        )
+    return interested
+
+
+def needs_summary(article: ArticleRecord) -> bool:
+    """True unless the article already has a short snippet (from its feed)."""
+    snippet = article.get("snippet")
+    return not snippet or len(snippet) > 200
+
+
+def nlp_summary(article: ArticleRecord) -> Callable[[], str]:
+    """
+    newspaper's NLP summary of article, as the LLM summary's fallback: the
+    LLM summary replaces any snippet, so the NLP tier only runs if it fails.
+    """
+    return lambda: summarize_text(
+        article.get("title", ""), article["full_text"], article["link"]
+    )
+
 
-    # Step 1: Fetch articles
-    rss_articles = fetch_from_rss(RSS_URLS)
-    scraped_articles = scrape_articles(SCRAPE_BASE_URLS)
-    all_articles = rss_articles + scraped_articles
+def interested_accounts(
+    article: ArticleRecord, accounts: List[Account]
+) -> List[Account]:
+    """
+    The accounts that want an article and have not posted it (or a
+    paraphrase) yet, extracting its text first if needed. Releases the
+    article's text when no account wants it.
+    """
+    full_text = article.get("full_text")
+    if not full_text:
+        extract_result = extract_article_content(article["link"])
+        if extract_result.get("success"):
+            full_text = extract_result.get("text")
+            article["full_text"] = full_text
+            logger.info(f"Extracted full text for: {article.get('title', '')[:50]}...")
+    if not full_text:
+        return []
+
+    logger.info("Handling duplicates....")
+    interested = [
+        account
+        for account in accounts
+        if account.wants(article) and not is_duplicate_for(account, article)
+    ]
+    if not interested:
+        logger.info(
+            f"Skipping duplicate or off-topic: {article.get('title', '')[:50]}..."
+        )
+        article.release()
+        return []
+    return interested
+
+
+def run_pipeline(sources: list, run_stats: dict):
+    accounts = load_accounts()
+
+    # Step 1: Fetch articles from the due sources (shared by all accounts)
+    reset_fetch_cache()
+    all_articles = fetch_sources(sources, on_article=try_fast_path)
+    run_stats["fetched"] = len(all_articles)
     logger.info(
-        f"Fetched {len(all_articles)} total articles ({len(rss_articles)} RSS, {len(scraped_articles)} scraped)"
+        f"Fetched {len(all_articles)} total articles from {len(sources)} sources"
     )
+    for source in sources:
+        result = poll_results.get(source.name)
+        if result:
+            poller.observe(
+                source, result["entry_times"], result["new_links"], result["seconds"]
+            )
+    poller.save()
 
-    if not all_articles:
+    if not all_articles and all(q.empty() for q in article_queues.values()):
         logger.info("No new articles found; skipping post.")
         return
 
     processed_count = 0
     logger.info("Processing articles....")
 
-    # Step 2: Process articles
+    # Step 2: Dedupe per account, then summarize once for every account that
+    # still wants the article
     for article in all_articles:
-        full_text = article.get("full_text")
-        if not full_text:
-            extract_result = extract_article_content(article["link"])
-            if extract_result.get("success"):
-                full_text = extract_result.get("text")
-                article["full_text"] = full_text
-                article["snippet"] = extract_result.get("summary", "")
+        interested = prepare_article(article, accounts)
+        if not interested:
+            continue
+        for account in interested:
+            queue_article(account, article)
+        processed_count += 1
+        logger.info(
+            f"Queued article for {', '.join(a.name for a in interested)}: "
+            f"{article.get('title', '')[:50]}..."
+        )
+
+    logger.info(f"Processed {processed_count} unique articles")
+    run_stats["queued"] = processed_count
+    log_extraction_stats()
+    rank_and_post(accounts, all_articles, run_stats)
+
+
+def rank_and_post(
+    accounts: List[Account], new_articles: List[ArticleRecord], run_stats: dict
+):
+    """Rank, generate and post each account's queued articles."""
+    # Steps 3-4: Rank and generate per account. Ranking runs one account at a
+    # time (it shares the local LLM); posts for an article picked by several
+    # accounts are generated once.
+    generated: Dict[str, dict] = {}
+    plans = []
+    ranked_pool: List[ArticleRecord] = []
+    for account in accounts:
+        selected, ranked = rank_for_account(account)
+        ranked_pool.extend(ranked)
+        for article in selected:
+            if article["link"] not in generated:
+                generated[article["link"]] = generate_post(article)
                 logger.info(
-                    f"Extracted full text for: {article.get('title', '')[:50]}..."
+                    f"Generated post for: {generated[article['link']].get('text', '')[:50]}..."
                 )
+        if selected:
+            plans.append((account, [(a, generated[a["link"]]) for a in selected]))
+    print("=================================================")
+    print(generated)
 
-        if full_text:
-            logger.info("Handling duplicates....")
-            if is_duplicate(full_text):
-                logger.info(f"Skipping duplicate: {article.get('title', '')[:50]}...")
-                continue
-            if "snippet" in article and len(article["snippet"]) > 200:
-                article["snippet"] = summarize_article(full_text)
-            article_queue.put(article)
-            processed_count += 1
-            logger.info(f"Queued article: {article.get('title', '')[:50]}...")
+    # Step 5: Post to each account on its own schedule, accounts in parallel
+    if plans:
+        with ThreadPoolExecutor(max_workers=len(plans)) as pool:
+            counts = list(pool.map(lambda plan: post_for_account(*plan), plans))
+        run_stats["posted"] = sum(counts)
 
-    logger.info(f"Processed {processed_count} unique articles")
+    finish_run(new_articles + ranked_pool, run_stats)
 
-    if article_queue.empty():
-        logger.info("No unique articles after processing; skipping.")
-        return
 
-    # Step 3: Rank articles
-    articles_to_rank = []
-    while not article_queue.empty():
-        articles_to_rank.append(article_queue.get())
+def finish_run(articles: List[ArticleRecord], run_stats: dict):
+    """Free text of articles not still waiting in a queue and log the outcome."""
+    still_queued = {id(a) for q in article_queues.values() for a in list(q.queue)}
+    for article in articles:
+        if id(article) not in still_queued:
+            article.release()
+
+    if not run_stats["posted"]:
+        logger.warning("No posts sent - either no unique articles or posting errors")
+    else:
+        logger.info(f"Pipeline complete: {run_stats['posted']} posts sent successfully")
+
+
+def rank_for_account(
+    account: Account,
+) -> Tuple[List[ArticleRecord], List[ArticleRecord]]:
+    """
+    Rank an account's queued articles. Returns (articles to post this run,
+    every article that was ranked).
+    """
+    articles_to_rank, allowed = take_ranking_batch(account)
+    if not articles_to_rank:
+        return [], []
     ranked_articles = Rank_News_Items(articles_to_rank)
-    logger.info(f"Ranked {len(ranked_articles)} articles")
+    logger.info(f"[{account.name}] Ranked {len(ranked_articles)} articles")
     print(ranked_articles)
 
     # Limit to top N articles to avoid spam flags from too many similar posts
-    MAX_POSTS_PER_RUN = 3  # Adjust based on testing (start low)
-    ranked_articles = ranked_articles[:MAX_POSTS_PER_RUN]
-    logger.info(f"Limited to top {len(ranked_articles)} articles for posting.")
+    ranked_articles = ranked_articles[: min(account.max_posts_per_run, allowed)]
+    logger.info(
+        f"[{account.name}] Limited to top {len(ranked_articles)} articles for posting."
+    )
+    return ranked_articles, articles_to_rank
 
-    # Step 4: Generate posts after ranking
-    for article in ranked_articles:
-        post = generate_post(article)
-        post_queue.put(post)
-        logger.info(f"Generated post for: {post.get('text', '')[:50]}...")
 
-    print("=================================================")
-    # Drain queue for logging (optional)
-    generated_posts = []
-    while not post_queue.empty():
-        generated_posts.append(post_queue.get())
-    print(generated_posts)
+def take_ranking_batch(account: Account) -> Tuple[List[ArticleRecord], int]:
+    """
+    Take an account's queued articles for ranking and score their novelty
+    against its history. Returns (articles, posts allowed now); articles stay
+    queued when the account may not post now.
+    """
+    article_queue = article_queues.get(account.name)
+    if article_queue is None or article_queue.empty():
+        logger.info(f"[{account.name}] No unique articles after processing; skipping.")
+        return [], 0
 
-    # Step 5: Post to X with delays and retries
+    allowed = account.posts_allowed_now()
+    if allowed == 0:
+        logger.info(
+            f"[{account.name}] Post cap reached or outside active hours; keeping "
+            f"{article_queue.qsize()} articles queued"
+        )
+        return [], 0
+
+    articles_to_rank = []
+    while not article_queue.empty():
+        articles_to_rank.append(article_queue.get())
+    # Novelty is relative to this account's history
+    store = account.history().embedding_store()
+    for article in articles_to_rank:
+        score_novelty(article, store)
+    return articles_to_rank, allowed
+
+
+def post_for_account(account: Account, plan: List[Tuple[ArticleRecord, dict]]) -> int:
+    """Post generated posts to one account with delays and retries."""
+    credentials = account.x_credentials()
     posted_count = 0
-    for idx, post in enumerate(generated_posts):
-        success = post_to_x_with_retry(post)
+    for idx, (article, post) in enumerate(plan):
+        # In worker mode another process may already have posted this story
+        if not claim_post(account.name, article["link"]):
+            logger.info(f"[{account.name}] Already claimed elsewhere: {article['link']}")
+            continue
+        success = post_to_x_with_retry(post, credentials=credentials)
+        finish_post(account.name, article["link"], success)
         if success:
-            # Save only on final success (adjust if save_posted uses url/full_text)
-            url = post.get(
-                "url", ""
-            )  # Assuming post has these; add if needed in generate_post
-            full_text = post.get("full_text", "")
-            save_posted(url, full_text)
+            record_posted(account, article)
             posted_count += 1
             logger.info(
-                f"Successfully posted (total so far: {posted_count}/{len(generated_posts)})"
+                f"[{account.name}] Successfully posted (total so far: {posted_count}/{len(plan)})"
             )
         else:
-            logger.error("Post failed after retries - check logs above")
+            logger.error(
+                f"[{account.name}] Post failed after retries - check logs above"
+            )
 
         # Delay before next post to mimic human behavior and avoid spam detection
-        if idx < len(generated_posts) - 1:  # No delay after last post
+        if idx < len(plan) - 1:  # No delay after last post
             delay = post.get(
                 "recommended_delay", random.uniform(60, 180)
             )  # 1-3 min default
             logger.info(
-                f"⏳ Delaying {delay:.0f}s before next post to avoid spam flags..."
+                f"⏳ [{account.name}] Delaying {delay:.0f}s before next post to avoid spam flags..."
             )
             time.sleep(delay)
+    return posted_count
 
-    if posted_count == 0:
-        logger.warning("No posts sent - either no unique articles or posting errors")
-    else:
-        logger.info(
-            f"Pipeline complete: {posted_count}/{len(generated_posts)} posts sent successfully"
-        )
+
+def record_posted(account: Account, article: ArticleRecord):
+    """Bookkeeping after a successful batch post to an account."""
+    # Save only on final success
+    account.history().save(
+        article.get("link", ""),
+        article.get("full_text", ""),
+        getattr(article, "embedding", None),
+    )
+    record_post_latency(article, "batch")
+    account.recent_posts.append(time.time())
+    ITEMS.inc(stage="posted")
+
+
+def start_monitor_thread():
+    """Serve /health and /metrics from this process so pipeline metrics are live."""
+    if os.getenv("MONITOR_ENABLED", "true").lower() != "true":
+        return
+    try:
+        from monitor import start_monitor_server
+    except ImportError as e:
+        logger.warning(f"Monitor server unavailable: {e}")
+        return
+    port = int(os.getenv("MONITOR_PORT", 8000))
+    host = os.getenv("MONITOR_HOST", "0.0.0.0")
+    Thread(target=start_monitor_server, args=(host, port), daemon=True).start()
+
+
+def log_startup_report(phase: str):
+    """Log time since startup and the heavy imports paid for so far."""
+    elapsed = time.perf_counter() - STARTED
+    loaded = ", ".join(
+        f"{name} {seconds * 1000:.0f}ms"
+        for name, seconds in sorted(import_times.items(), key=lambda kv: -kv[1])
+    )
+    logger.info(f"Startup ({phase}): {elapsed:.2f}s; lazy imports: {loaded or 'none'}")
+    return elapsed
 
 
 if __name__ == "__main__":
+    if WORKER_MODE:
+        from worker import run_worker
+
+        run_worker()
+        sys.exit(0)
+    if ASYNC_PIPELINE:
+        from async_pipeline import run_async_pipeline
+
+        start_monitor_thread()
+        STARTUP_SECONDS.set(log_startup_report("ready"))
+        run_async_pipeline()
+        sys.exit(0)
+
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    start_monitor_thread()
+    STARTUP_SECONDS.set(log_startup_report("ready"))
     pipeline_job()
+    log_startup_report("first run done")
     scheduler = BlockingScheduler()
 
-    # Schedule the pipeline to run every hour
+    # Tick often; the adaptive poller decides which sources are actually due
     _ = scheduler.add_job(
         pipeline_job,
-        trigger=CronTrigger(hour="6", minute=0),  # Run at the start of every hour
+        trigger=IntervalTrigger(seconds=POLL_TICK_SECONDS),
         id="pipeline_job",
         max_instances=1,
+        coalesce=True,
         replace_existing=True,
     )
-    logger.info("Starting APScheduler for hourly pipeline execution...")
+    logger.info(
+        f"Starting APScheduler, checking for due sources every {POLL_TICK_SECONDS}s..."
+    )
     try:
         scheduler.start()
     except KeyboardInterrupt:
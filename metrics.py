@@ -0,0 +1,263 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self.values.items())
+        return super().render() + [
+            f"{self.name}{_format_labels(key)} {value}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[_label_key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (bucket counts, sum, count)
+        self.values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, count = self.values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(c), s, n)) for k, (c, s, n) in self.values.items()]
+        lines = super().render()
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(key, {"le": str(bound)})
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            inf_labels = _format_labels(key, {"le": "+Inf"})
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    """Process-wide collection of metrics, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds", "Wall time spent per call of each pipeline stage"
+)
+ITEMS = registry.counter(
+    "pipeline_items_total",
+    "Items seen by each stage (fetched, duplicate, unique, ranked, posted, ...)",
+)
+CACHE_HITS = registry.counter("pipeline_cache_hits_total", "Cache hits by cache name")
+LLM_TOKENS = registry.counter(
+    "pipeline_llm_tokens_total", "LLM tokens used by task and kind (prompt/completion)"
+)
+LLM_CALLS = registry.counter(
+    "pipeline_llm_calls_total", "LLM calls by task, model and status"
+)
+LLM_SECONDS = registry.histogram(
+    "pipeline_llm_seconds",
+    "LLM call latency by task and model",
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 120),
+)
+LLM_PROMPT_TOKENS = registry.histogram(
+    "pipeline_llm_prompt_tokens",
+    "Estimated prompt tokens per LLM call by task",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+LLM_CIRCUIT_OPEN = registry.gauge(
+    "pipeline_llm_circuit_open", "1 while a model's circuit breaker is open"
+)
+POSTS = registry.counter("pipeline_posts_total", "Post attempts by path and status")
+RETRIES = registry.counter("pipeline_post_retries_total", "Post retries after failures")
+LAST_RUN = registry.gauge("pipeline_last_run", "Summary of the last pipeline run")
+PUBLISH_TO_POST = registry.histogram(
+    "pipeline_publish_to_post_seconds",
+    "Seconds between article publication and posting",
+    buckets=(60, 300, 600, 1800, 3600, 7200, 21600, 86400),
+)
+STARTUP_SECONDS = registry.gauge(
+    "pipeline_startup_seconds", "Seconds from process start until ready to run"
+)
+IMPORT_SECONDS = registry.gauge(
+    "pipeline_import_seconds", "Time spent importing heavy modules on first use"
+)
+JOBS = registry.gauge("pipeline_jobs", "Jobs in the worker-mode job store by status")
+
+
+# Callables (stage, wall_seconds, cpu_seconds) notified of every stage timing,
+# e.g. by profiling while a profiled run is in progress
+stage_listeners: List[Callable[[str, float, float], None]] = []
+
+
+def observe_stage(stage: str, wall: float, cpu: Optional[float] = None):
+    """Record one stage timing and pass it on to any stage listeners."""
+    STAGE_SECONDS.observe(wall, stage=stage)
+    for listener in list(stage_listeners):
+        listener(stage, wall, cpu)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observe the wall time of the enclosed block under pipeline_stage_seconds."""
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    try:
+        yield
+    finally:
+        observe_stage(
+            stage, time.perf_counter() - started, time.thread_time() - cpu_started
+        )
+
+
+def timed(stage: str):
+    """
+    Decorator form of stage_timer. Coroutine functions are timed across their
+    awaits, so their CPU time includes whatever else the event loop ran.
+    """
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage_timer(stage):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_llm_usage(task: str, response) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Count prompt/completion tokens reported on a LangChain chat response and
+    return them (None where the server did not report a count).
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    meta = getattr(response, "response_metadata", None) or {}
+    prompt = usage.get("input_tokens", meta.get("prompt_eval_count"))
+    completion = usage.get("output_tokens", meta.get("eval_count"))
+    if prompt:
+        LLM_TOKENS.inc(prompt, task=task, kind="prompt")
+    if completion:
+        LLM_TOKENS.inc(completion, task=task, kind="completion")
+    return prompt, completion
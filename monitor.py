@@ -8,12 +8,18 @@ import json
 import logging
 import os
 import time
+
+STARTED = time.perf_counter()
+
+import urllib.error
+import urllib.request
 from datetime import datetime, timedelta
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
-from typing import Dict, Any
-import psutil
-import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Any, Optional, Tuple
+from metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,17 +27,95 @@ logger = logging.getLogger(__name__)
 
 
 class HealthMonitor:
-    """Health monitoring and metrics collection"""
+    """
+    Health monitoring and metrics collection.
 
-    def __init__(self):
+    Once start_sampler() is called, system stats, the Ollama check and
+    posted-file stats are refreshed by a background thread every
+    sample_interval seconds and requests are served from those snapshots.
+    Without the sampler (one-off checks) values are collected on demand.
+    """
+
+    def __init__(self, sample_interval: Optional[float] = None):
         self.start_time = time.time()
         self.posted_file = os.getenv("POSTED_FILE", "posted.json")
         self.ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.sample_interval = sample_interval or float(
+            os.getenv("MONITOR_SAMPLE_INTERVAL", "15")
+        )
+        self._snapshots: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._sampler: Optional[Thread] = None
+        self._posted_cache: Tuple[Optional[float], Dict[str, Any]] = (None, {})
+
+    def _collectors(self) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        return {
+            "system": self._collect_system_metrics,
+            "ollama": self._collect_ollama_health,
+            "application": self._collect_application_metrics,
+        }
+
+    def refresh(self):
+        """Collect every snapshot now"""
+        for name, collect in self._collectors().items():
+            value = collect()
+            with self._lock:
+                self._snapshots[name] = (time.time(), value)
+
+    def _run_sampler(self):
+        while not self._stop.wait(self.sample_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health sampler error: {e}")
+
+    def start_sampler(self):
+        """Take a first sample and keep refreshing in a background thread"""
+        if self._sampler:
+            return
+        import psutil
+
+        psutil.cpu_percent(interval=None)  # Prime the non-blocking CPU counter
+        self._sampler = Thread(target=self._run_sampler, daemon=True)
+        self.refresh()
+        self._sampler.start()
+
+    def stop_sampler(self):
+        self._stop.set()
+
+    def _snapshot(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            cached = self._snapshots.get(name)
+        if cached is None:
+            value = self._collectors()[name]()
+            cached = (time.time(), value)
+            with self._lock:
+                self._snapshots[name] = cached
+        sampled_at, value = cached
+        return {**value, "snapshot_age_seconds": round(time.time() - sampled_at, 3)}
 
     def get_system_metrics(self) -> Dict[str, Any]:
-        """Get system resource metrics"""
+        """Get system resource metrics (cached snapshot)"""
+        return self._snapshot("system")
+
+    def check_ollama_health(self) -> Dict[str, Any]:
+        """Check if Ollama service is healthy (cached snapshot)"""
+        return self._snapshot("ollama")
+
+    def get_application_metrics(self) -> Dict[str, Any]:
+        """Get application-specific metrics (cached snapshot, live uptime)"""
+        metrics = self._snapshot("application")
+        metrics["uptime_seconds"] = time.time() - self.start_time
+        return metrics
+
+    def _collect_system_metrics(self) -> Dict[str, Any]:
+        """Sample system resource metrics"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            import psutil  # imported here so one-off checks start fast
+
+            # Short blocking sample only for one-off checks without the sampler
+            cpu_percent = psutil.cpu_percent(interval=None if self._sampler else 0.1)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage("/")
 
@@ -54,57 +138,87 @@ class HealthMonitor:
             logger.error(f"Error getting system metrics: {e}")
             return {}
 
-    def check_ollama_health(self) -> Dict[str, Any]:
-        """Check if Ollama service is healthy"""
+    def _collect_ollama_health(self) -> Dict[str, Any]:
+        """Query Ollama for its models"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=10)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return {
-                    "status": "healthy",
-                    "models": [m.get("name", "unknown") for m in models],
-                    "model_count": len(models),
-                }
-            else:
-                return {"status": "unhealthy", "error": f"HTTP {response.status_code}"}
+            url = f"{self.ollama_url}/api/tags"
+            with urllib.request.urlopen(url, timeout=10) as response:
+                models = json.load(response).get("models", [])
+            return {
+                "status": "healthy",
+                "models": [m.get("name", "unknown") for m in models],
+                "model_count": len(models),
+            }
+        except urllib.error.HTTPError as e:
+            return {"status": "unhealthy", "error": f"HTTP {e.code}"}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
 
-    def get_application_metrics(self) -> Dict[str, Any]:
-        """Get application-specific metrics"""
+    def _collect_application_metrics(self) -> Dict[str, Any]:
+        """Read posting stats, re-parsing the posted file only when it changes"""
+        metrics = {"posted_articles_count": 0, "last_post_time": None}
         try:
-            metrics = {
-                "uptime_seconds": time.time() - self.start_time,
-                "posted_articles_count": 0,
-                "last_post_time": None,
-            }
-
-            # Check posted articles
-            if os.path.exists(self.posted_file):
-                try:
-                    with open(self.posted_file, "r") as f:
-                        posted_data = json.load(f)
-
-                    if isinstance(posted_data, list):
-                        metrics["posted_articles_count"] = len(posted_data)
-                        if posted_data:
-                            # Assuming the data has timestamps
-                            metrics["last_post_time"] = posted_data[-1].get(
-                                "timestamp", "unknown"
-                            )
-                    elif isinstance(posted_data, dict):
-                        metrics["posted_articles_count"] = len(posted_data)
-
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in {self.posted_file}")
-                except Exception as e:
-                    logger.error(f"Error reading {self.posted_file}: {e}")
-
+            mtime = os.path.getmtime(self.posted_file)
+        except OSError:
             return metrics
 
+        cached_mtime, cached = self._posted_cache
+        if cached_mtime == mtime:
+            return dict(cached)
+        try:
+            with open(self.posted_file, "r") as f:
+                posted_data = json.load(f)
+
+            if isinstance(posted_data, list):
+                metrics["posted_articles_count"] = len(posted_data)
+                if posted_data:
+                    # Assuming the data has timestamps
+                    metrics["last_post_time"] = posted_data[-1].get(
+                        "timestamp", "unknown"
+                    )
+            elif isinstance(posted_data, dict):
+                timestamps = posted_data.get("timestamps", [])
+                metrics["posted_articles_count"] = len(timestamps)
+                if timestamps:
+                    metrics["last_post_time"] = datetime.utcfromtimestamp(
+                        max(timestamps)
+                    ).isoformat()
+            self._posted_cache = (mtime, dict(metrics))
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in {self.posted_file}")
         except Exception as e:
-            logger.error(f"Error getting application metrics: {e}")
-            return {"error": str(e)}
+            logger.error(f"Error reading {self.posted_file}: {e}")
+            metrics["error"] = str(e)
+        return metrics
+
+    def get_prometheus_metrics(self) -> str:
+        """Render system, application and pipeline metrics in Prometheus format"""
+        system = self.get_system_metrics()
+        app = self.get_application_metrics()
+        ollama = self.check_ollama_health()
+
+        samples = [
+            ("process_uptime_seconds", "gauge", app.get("uptime_seconds", 0)),
+            ("posted_articles", "gauge", app.get("posted_articles_count", 0)),
+            ("ollama_up", "gauge", 1 if ollama.get("status") == "healthy" else 0),
+            ("system_cpu_percent", "gauge", system.get("cpu_percent", 0)),
+            (
+                "system_memory_percent",
+                "gauge",
+                system.get("memory", {}).get("percent", 0),
+            ),
+            ("system_disk_percent", "gauge", system.get("disk", {}).get("percent", 0)),
+        ]
+        lines = []
+        for name, metric_type, value in samples:
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {value}")
+        lines.append("# TYPE monitor_snapshot_age_seconds gauge")
+        snapshots = {"system": system, "application": app, "ollama": ollama}
+        for snapshot, data in snapshots.items():
+            age = data.get("snapshot_age_seconds", 0)
+            lines.append(f'monitor_snapshot_age_seconds{{snapshot="{snapshot}"}} {age}')
+        return "\n".join(lines) + "\n" + registry.render()
 
     def get_health_status(self) -> Dict[str, Any]:
         """Get overall health status"""
@@ -146,6 +260,8 @@ class HealthHandler(BaseHTTPRequestHandler):
         if self.path == "/health":
             self._handle_health()
         elif self.path == "/metrics":
+            self._handle_prometheus()
+        elif self.path == "/metrics.json":
             self._handle_metrics()
         elif self.path == "/ready":
             self._handle_ready()
@@ -154,6 +270,31 @@ class HealthHandler(BaseHTTPRequestHandler):
         else:
             self._send_response(404, {"error": "Not found"})
 
+    def do_POST(self):
+        """Handle POST requests"""
+        if self.path == "/profile":
+            self._handle_profile()
+        else:
+            self._send_response(404, {"error": "Not found"})
+
+    def _handle_profile(self):
+        """Ask the pipeline to profile its next run"""
+        try:
+            from profiling import request_profile, COVERAGE, PROFILE_DIR
+
+            request_profile()
+            self._send_response(
+                202,
+                {
+                    "profile_requested": True,
+                    "output_dir": PROFILE_DIR,
+                    "coverage": COVERAGE,
+                },
+            )
+        except Exception as e:
+            logger.error(f"Profile request error: {e}")
+            self._send_response(500, {"error": "Internal server error"})
+
     def _handle_health(self):
         """Handle health check endpoint"""
         try:
@@ -164,8 +305,17 @@ class HealthHandler(BaseHTTPRequestHandler):
             logger.error(f"Health check error: {e}")
             self._send_response(500, {"error": "Internal server error"})
 
+    def _handle_prometheus(self):
+        """Handle Prometheus metrics endpoint"""
+        try:
+            body = self.monitor.get_prometheus_metrics()
+            self._send_text(200, body, PROMETHEUS_CONTENT_TYPE)
+        except Exception as e:
+            logger.error(f"Prometheus metrics error: {e}")
+            self._send_response(500, {"error": "Internal server error"})
+
     def _handle_metrics(self):
-        """Handle metrics endpoint"""
+        """Handle JSON metrics endpoint"""
         try:
             metrics = {
                 "system": self.monitor.get_system_metrics(),
@@ -202,8 +352,10 @@ class HealthHandler(BaseHTTPRequestHandler):
             "version": "1.0.0",
             "endpoints": {
                 "/health": "Health check with detailed status",
-                "/metrics": "System and application metrics",
+                "/metrics": "System, application and pipeline metrics (Prometheus)",
+                "/metrics.json": "System and application metrics (JSON)",
                 "/ready": "Readiness check for dependencies",
+                "/profile": "POST to profile the next pipeline run",
                 "/": "This information page",
             },
             "timestamp": datetime.utcnow().isoformat(),
@@ -220,6 +372,13 @@ class HealthHandler(BaseHTTPRequestHandler):
         response_data = json.dumps(data, indent=2, default=str)
         self.wfile.write(response_data.encode("utf-8"))
 
+    def _send_text(self, status_code: int, body: str, content_type: str):
+        """Send plain-text response"""
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
 
 def create_handler(monitor):
     """Create handler class with monitor instance"""
@@ -233,20 +392,23 @@ def create_handler(monitor):
 def start_monitor_server(host="0.0.0.0", port=8000):
     """Start the monitoring HTTP server"""
     monitor = HealthMonitor()
+    monitor.start_sampler()
     handler_class = create_handler(monitor)
 
     try:
-        server = HTTPServer((host, port), handler_class)
+        server = ThreadingHTTPServer((host, port), handler_class)
+        server.daemon_threads = True
         logger.info(f"Starting health monitor server on {host}:{port}")
         logger.info("Available endpoints:")
         logger.info(f"  http://{host}:{port}/health - Health check")
-        logger.info(f"  http://{host}:{port}/metrics - Metrics")
+        logger.info(f"  http://{host}:{port}/metrics - Metrics (Prometheus)")
         logger.info(f"  http://{host}:{port}/ready - Readiness check")
 
         server.serve_forever()
 
     except KeyboardInterrupt:
         logger.info("Shutting down monitor server...")
+        monitor.stop_sampler()
         server.shutdown()
     except Exception as e:
         logger.error(f"Monitor server error: {e}")
@@ -257,6 +419,7 @@ def run_health_check():
     """Run a one-time health check and exit"""
     monitor = HealthMonitor()
     health_data = monitor.get_health_status()
+    health_data["check_seconds"] = round(time.perf_counter() - STARTED, 3)
 
     print(json.dumps(health_data, indent=2, default=str))
 
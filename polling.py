@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from config import (
+    logger,
+    POLL_STATE_FILE,
+    POLL_MIN_INTERVAL_SECONDS,
+    POLL_MAX_INTERVAL_SECONDS,
+    POLL_MAX_REQUESTS_PER_HOUR,
+    POLL_TICK_BUDGET_SECONDS,
+)
+from sources import Source
+
+RATE_SMOOTHING = 0.3  # EWMA weight of the newest observation
+BACKOFF_FACTOR = 1.5  # Interval growth after a poll with nothing new
+
+
+class AdaptivePoller:
+    """
+    Learns how often each source publishes and decides which sources to poll.
+
+    A source's interval is the expected time until its next new entry, learned
+    as an EWMA of new entries per second and clamped to
+    [POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS]. A source starts at
+    its registry poll_interval and backs off while it has nothing new. Each
+    tick also respects a global poll-per-hour cap and a per-tick budget of
+    expected fetch seconds.
+    """
+
+    def __init__(self, state_file: str = POLL_STATE_FILE):
+        self.state_file = state_file
+        self.state: Dict[str, Dict] = {}
+        self.recent_polls: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r") as f:
+                self.state = json.load(f)
+            logger.info(f"Loaded polling state for {len(self.state)} sources")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Failed to load {self.state_file}: {e}. Starting fresh.")
+
+    def save(self):
+        try:
+            with open(self.state_file, "w") as f:
+                json.dump(self.state, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save polling state: {e}")
+
+    def _source_state(self, source: Source) -> Dict:
+        return self.state.setdefault(
+            source.name,
+            {
+                "interval": float(source.poll_interval),
+                "next_poll": 0.0,
+                "last_poll": None,
+                "rate": None,  # new entries per second
+                "last_entry_time": None,
+                "cost_seconds": None,
+            },
+        )
+
+    def due(self, sources: List[Source], now: Optional[float] = None) -> List[Source]:
+        """
+        Sources to poll this tick: highest priority and most overdue first,
+        until the hourly poll cap or the tick's fetch-time budget is reached.
+        """
+        now = now or time.time()
+        with self._lock:
+            while self.recent_polls and self.recent_polls[0] < now - 3600:
+                self.recent_polls.popleft()
+
+            overdue = [
+                (s, now - self._source_state(s)["next_poll"])
+                for s in sources
+                if self._source_state(s)["next_poll"] <= now
+            ]
+            overdue.sort(key=lambda item: (item[0].priority, item[1]), reverse=True)
+
+            selected = []
+            budget = POLL_TICK_BUDGET_SECONDS
+            for source, _ in overdue:
+                if len(self.recent_polls) >= POLL_MAX_REQUESTS_PER_HOUR:
+                    logger.warning(
+                        "Hourly poll cap reached; deferring remaining sources"
+                    )
+                    break
+                cost = self.state[source.name]["cost_seconds"] or 0.0
+                if selected and cost > budget:
+                    continue
+                budget -= cost
+                selected.append(source)
+                self.recent_polls.append(now)
+            return selected
+
+    def observe(
+        self,
+        source: Source,
+        entry_times: List[float],
+        new_links: int = 0,
+        seconds: float = 0.0,
+        now: Optional[float] = None,
+    ):
+        """
+        Record the outcome of polling source and schedule its next poll.
+        entry_times are feed entry publish timestamps (RSS); new_links counts
+        newly discovered article links (scrape sources).
+        """
+        now = now or time.time()
+        with self._lock:
+            state = self._source_state(source)
+            last_entry = state["last_entry_time"]
+            new_times = [t for t in entry_times if last_entry is None or t > last_entry]
+            if entry_times:
+                state["last_entry_time"] = max(entry_times + [last_entry or 0.0])
+
+            # The first poll of a feed only establishes a baseline
+            new_count = new_links + (len(new_times) if last_entry is not None else 0)
+            if state["last_poll"] is not None:
+                elapsed = max(now - state["last_poll"], 1.0)
+                sample = new_count / elapsed
+                state["rate"] = (
+                    sample
+                    if state["rate"] is None
+                    else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * state["rate"]
+                )
+
+            if new_count == 0:
+                interval = state["interval"] * BACKOFF_FACTOR
+            elif state["rate"]:
+                interval = 1.0 / state["rate"]
+            else:
+                interval = state["interval"]
+            state["interval"] = min(
+                max(interval, POLL_MIN_INTERVAL_SECONDS), POLL_MAX_INTERVAL_SECONDS
+            )
+
+            state["cost_seconds"] = (
+                seconds
+                if state["cost_seconds"] is None
+                else RATE_SMOOTHING * seconds
+                + (1 - RATE_SMOOTHING) * state["cost_seconds"]
+            )
+            state["last_poll"] = now
+            state["next_poll"] = now + state["interval"]
+            logger.info(
+                f"{source.name}: {new_count} new entries, next poll in "
+                f"{state['interval'] / 60:.0f} min"
+            )
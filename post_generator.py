@@ -1,9 +1,12 @@
 import random
-import urllib.request
 from config import KEYWORDS
+from http_client import is_reachable
+from keywords import get_matcher
 from imagepicker import pick_image
+from metrics import timed
 
 
+@timed("generate")
 def generate_post(article: dict) -> dict:
     """Generate a varied, Twitter/X-friendly post from an article."""
     # Base hashtags (reduced to avoid spam flags)
@@ -49,12 +52,10 @@ def generate_post(article: dict) -> dict:
     )  # Shorter for natural fit
 
     # Pick relevant keywords and emojis
-    post_keywords = [
-        kw
-        for kw in KEYWORDS
-        if kw.lower() in article.get("title", "").lower()
-        or kw.lower() in snippet.lower()
-    ]
+    post_keywords = get_matcher().topics(article.get("title", ""), snippet)
+    for topic in article.get("topics", []):
+        if topic not in post_keywords:
+            post_keywords.append(topic)
     selected_keyword = (
         random.choice(post_keywords) if post_keywords else random.choice(KEYWORDS)
     )
@@ -75,15 +76,9 @@ def generate_post(article: dict) -> dict:
     if not dynamic_tags:
         all_tags = base_tags
 
-    # Validate and set link
+    # Validate and set link (reuses this run's download of the article if any)
     url = article.get("link", "")
-    article_link = None
-    if url:
-        try:
-            if urllib.request.urlopen(url).getcode() == 200:
-                article_link = url
-        except Exception:
-            article_link = None
+    article_link = url if url and is_reachable(url) else None
 
     # Choose template and CTA
     template = random.choice(templates)
@@ -1,24 +1,27 @@
+import asyncio
 from typing import Dict, Optional
-import tweepy
-from config import (
-    logger,
-    X_API_KEY,
-    X_API_SECRET,
-    X_ACCESS_TOKEN,
-    X_ACCESS_SECRET,
-)
-from x import init_twitter_client
+from config import logger, x_credentials
+from x import init_async_twitter_client, init_twitter_client
+from lazy import lazy_import
+from metrics import POSTS, stage_timer, timed
 
 
-def post_to_x(post: Dict) -> bool:
-    """Post a tweet with optional image."""
+@timed("post")
+def post_to_x(post: Dict, credentials: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Post a tweet with optional image, using a credential profile from
+    config.x_credentials (the default X_* keys when not given).
+    """
     print("DEBUG: Entered post_to_x function")
     print(f"DEBUG: post argument: {post}")
-    client = init_twitter_client()
+    tweepy = lazy_import("tweepy")
+    credentials = credentials or x_credentials()
+    client = init_twitter_client(credentials)
     print(f"DEBUG: Twitter client initialized: {client}")
     if not client:
         logger.error("❌ No X client available")
         print("DEBUG: No X client available, returning False")
+        POSTS.inc(status="failure")
         return False
 
     try:
@@ -31,7 +34,10 @@ def post_to_x(post: Dict) -> bool:
             try:
                 print("DEBUG: Setting up Tweepy OAuth1UserHandler")
                 auth = tweepy.OAuth1UserHandler(
-                    X_API_KEY, X_API_SECRET, X_ACCESS_TOKEN, X_ACCESS_SECRET
+                    credentials["api_key"],
+                    credentials["api_secret"],
+                    credentials["access_token"],
+                    credentials["access_secret"],
                 )
                 api = tweepy.API(auth)
                 print(f"DEBUG: Tweepy API object created: {api}")
@@ -58,6 +64,7 @@ def post_to_x(post: Dict) -> bool:
         tweet_id = response.data.get("id")
         print(f"DEBUG: Tweet ID from response: {tweet_id}")
         logger.info(f"✅ Posted tweet ID: {tweet_id}")
+        POSTS.inc(status="success")
         return True
 
     except tweepy.Forbidden as e:
@@ -71,4 +78,36 @@ def post_to_x(post: Dict) -> bool:
         print(f"DEBUG: General exception: {e}")
 
     print("DEBUG: Returning False from post_to_x")
+    POSTS.inc(status="failure")
+    return False
+
+
+async def post_to_x_async(
+    post: Dict, credentials: Optional[Dict[str, str]] = None
+) -> bool:
+    """
+    post_to_x() on tweepy's async client, for text-only posts. Posts with an
+    image stay synchronous (media upload is only in the sync v1.1 API) and,
+    like setups without aiohttp, run post_to_x() in a worker thread.
+    """
+    credentials = credentials or x_credentials()
+    client = None if post.get("image_path") else init_async_twitter_client(credentials)
+    if client is None:
+        return await asyncio.to_thread(post_to_x, post, credentials)
+
+    tweepy = lazy_import("tweepy")
+    try:
+        with stage_timer("post"):
+            response = await client.create_tweet(text=post["text"])
+        tweet_id = response.data.get("id")
+        logger.info(f"✅ Posted tweet ID: {tweet_id}")
+        POSTS.inc(status="success")
+        return True
+    except tweepy.Forbidden as e:
+        logger.error(f"🚫 403 Forbidden: {e}. Check API permissions")
+    except tweepy.TooManyRequests:
+        logger.warning("⚠️ Rate limit hit; retry later")
+    except Exception as e:
+        logger.error(f"❌ Post failed: {e}")
+    POSTS.inc(status="failure")
     return False
@@ -0,0 +1,188 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Tuple
+from config import logger, PROFILE_MODE, PROFILE_DIR, PROFILE_KEEP
+from metrics import stage_listeners
+
+# Marker file that asks the next run to be profiled; lets a separate monitor
+# process (or an operator with shell access) request a profile.
+REQUEST_FILE = os.path.join(PROFILE_DIR, "profile-next")
+
+COVERAGE = (
+    "cProfile covers the pipeline thread and the worker threads it starts "
+    "during the run; threads already running before it (monitor, worker-mode "
+    "threads) are not profiled"
+)
+
+_requested = threading.Event()
+if PROFILE_MODE == "next":
+    _requested.set()
+
+
+def request_profile():
+    """Profile the next pipeline run."""
+    _requested.set()
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        open(REQUEST_FILE, "w").close()
+    except OSError as e:
+        logger.warning(f"Could not write profile request file: {e}")
+
+
+def _take_request() -> bool:
+    if PROFILE_MODE == "always":
+        return True
+    requested = _requested.is_set() or os.path.exists(REQUEST_FILE)
+    if requested:
+        _requested.clear()
+        try:
+            os.remove(REQUEST_FILE)
+        except OSError:
+            pass
+    return requested
+
+
+def _rotate():
+    runs = sorted(
+        d
+        for d in os.listdir(PROFILE_DIR)
+        if d.startswith("run-") and os.path.isdir(os.path.join(PROFILE_DIR, d))
+    )
+    for old in runs[:-PROFILE_KEEP]:
+        shutil.rmtree(os.path.join(PROFILE_DIR, old), ignore_errors=True)
+
+
+class _ThreadProfilers:
+    """
+    Gives every thread started during a profiled run its own cProfile
+    profiler (installed with threading.setprofile), so the fetch and
+    extraction pools show up in the report next to the calling thread.
+    """
+
+    def __init__(self):
+        self.profilers: List[Tuple[threading.Thread, cProfile.Profile]] = []
+        self.unsupported = False
+        self._lock = threading.Lock()
+
+    def start_thread(self, frame, event, arg):
+        # Called on the new thread's first profile event; its own profiler
+        # replaces this hook from then on
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Python 3.12+ allows one active cProfile at a time
+            sys.setprofile(None)
+            self.unsupported = True
+            return
+        with self._lock:
+            self.profilers.append((threading.current_thread(), profiler))
+
+    def finished(self) -> List[cProfile.Profile]:
+        """Profilers of the threads that have exited (and stopped profiling)."""
+        with self._lock:
+            running = [t.name for t, _ in self.profilers if t.is_alive()]
+            done = [p for t, p in self.profilers if not t.is_alive()]
+        if running:
+            logger.warning(
+                f"Profile leaves out {len(running)} threads still running: "
+                f"{', '.join(running[:5])}"
+            )
+        return done
+
+
+def _write_report(
+    profiler: cProfile.Profile,
+    thread_profilers: List[cProfile.Profile],
+    snapshot,
+    stages: Dict,
+    wall: float,
+):
+    run_dir = os.path.join(PROFILE_DIR, datetime.now().strftime("run-%Y%m%d-%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    for thread_profiler in thread_profilers:
+        stats.add(thread_profiler)
+    stats.dump_stats(os.path.join(run_dir, "profile.pstats"))
+    stats.sort_stats("cumulative").print_stats(50)
+    with open(os.path.join(run_dir, "profile.txt"), "w") as f:
+        f.write(f"Calling thread + {len(thread_profilers)} worker threads\n")
+        f.write(text.getvalue())
+
+    with open(os.path.join(run_dir, "memory.txt"), "w") as f:
+        for stat in snapshot.statistics("lineno")[:25]:
+            f.write(f"{stat}\n")
+
+    with open(os.path.join(run_dir, "stages.json"), "w") as f:
+        json.dump({"wall_seconds": wall, "stages": stages}, f, indent=2)
+
+    _rotate()
+    logger.info(f"Profile written to {run_dir}")
+
+
+@contextmanager
+def maybe_profile():
+    """
+    Profile the enclosed pipeline run if one was requested (PIPELINE_PROFILE
+    env, request_profile() or the monitor's /profile endpoint), otherwise do
+    nothing. Captures cProfile stats for the calling thread and the threads
+    it starts during the run (merged into one report), the top tracemalloc
+    allocations and per-stage wall/CPU time from all threads. Threads that
+    were already running before the run are not profiled.
+    """
+    if not _take_request():
+        yield
+        return
+
+    logger.info("Profiling this pipeline run...")
+    stages: Dict[str, Dict[str, float]] = {}
+    lock = threading.Lock()
+
+    def on_stage(stage: str, wall: float, cpu):
+        with lock:
+            entry = stages.setdefault(
+                stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            entry["calls"] += 1
+            entry["wall_seconds"] += wall
+            entry["cpu_seconds"] += cpu or 0.0
+
+    stage_listeners.append(on_stage)
+    tracemalloc_was_on = tracemalloc.is_tracing()
+    if not tracemalloc_was_on:
+        tracemalloc.start()
+    threads = _ThreadProfilers()
+    threading.setprofile(threads.start_thread)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        if threads.unsupported:
+            logger.warning(
+                "This Python allows only one cProfile at a time; the profile "
+                "covers the calling thread only"
+            )
+        wall = time.perf_counter() - started
+        stage_listeners.remove(on_stage)
+        snapshot = tracemalloc.take_snapshot()
+        if not tracemalloc_was_on:
+            tracemalloc.stop()
+        try:
+            _write_report(profiler, threads.finished(), snapshot, stages, wall)
+        except Exception as e:
+            logger.error(f"Failed to write profile: {e}")
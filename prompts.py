@@ -0,0 +1,81 @@
+import re
+from collections import Counter
+from typing import List
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with Llama tokenizers
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'“A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9$%][a-z0-9$%.,'-]*", re.I)
+_STOPWORDS = frozenset(
+    """and are but for has had its not our the was who why you
+    about after also been before being could from have into more most other
+    over said says such than that their them then there these they this those
+    through under were what when where which while with would will your""".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate prompt tokens for text without loading a tokenizer."""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, on a word boundary."""
+    text = (text or "").strip()
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for paragraph in (text or "").splitlines():
+        sentences.extend(s.strip() for s in _SENTENCE_END.split(paragraph))
+    return [s for s in sentences if s]
+
+
+def _content_words(sentence: str) -> List[str]:
+    return [
+        w.lower().strip(".,'-")
+        for w in _WORD.findall(sentence)
+        if (len(w) > 2 or any(c.isdigit() for c in w)) and w.lower() not in _STOPWORDS
+    ]
+
+
+def fit_text(text: str, max_tokens: int, lead_sentences: int = 2) -> str:
+    """
+    Condense text to about max_tokens: the lead sentences, then the
+    highest-scoring other sentences, in their original order. Sentences score
+    mostly by words shared with the lead (the story's subject), a little by
+    words that recur elsewhere (capped, so boilerplate repeated in every
+    paragraph cannot dominate), with a bonus for figures (prices,
+    percentages, dates) so key facts survive.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return (text or "").strip()
+    sentences = split_sentences(text)
+    frequency = Counter(w for s in sentences for w in _content_words(s))
+    lead_words = {w for s in sentences[:lead_sentences] for w in _content_words(s)}
+
+    def score(sentence: str) -> float:
+        words = _content_words(sentence)
+        if not words:
+            return 0.0
+        weight = sum(min(frequency[w], 2) - 1 + 3 * (w in lead_words) for w in words)
+        figures = sum(any(c.isdigit() for c in w) for w in words)
+        return (weight + 3 * figures) / len(words) ** 0.5
+
+    chosen = set(range(min(lead_sentences, len(sentences))))
+    used = sum(estimate_tokens(sentences[i]) for i in chosen)
+    rest = sorted(
+        range(len(chosen), len(sentences)), key=lambda i: -score(sentences[i])
+    )
+    for i in rest:
+        cost = estimate_tokens(sentences[i])
+        if used + cost <= max_tokens:
+            chosen.add(i)
+            used += cost
+    if used > max_tokens:  # Even the lead is over budget
+        return truncate_tokens(" ".join(sentences[:lead_sentences]), max_tokens)
+    return " ".join(sentences[i] for i in sorted(chosen))
@@ -1,7 +1,73 @@
-from langchain_ollama import ChatOllama
-from config import logger
+from typing import Dict, Tuple
+from config import logger, RANK_SNIPPET_TOKENS
+from llm import ainvoke, invoke
+from metrics import ITEMS, timed
+from prompts import fit_text
 
+# Static instructions first so Ollama can reuse the cached prefix across calls
+PROMPT_PREFIX = """
+You are a news ranking assistant. Rank the following crypto/web3/blockchain news items
+by their importance and relevance for investors and traders.
+Items marked with a novelty score (0 = already covered, 1 = new story) should be
+preferred when they are new.
+Return ONLY the top 3 items, no extra text.
+
+News items:
+"""
+
+
+def _novelty(item) -> float:
+    novelty = item.get("novelty")
+    return 1.0 if novelty is None else novelty
+
+
+def _build_prompt(news_items) -> Tuple[str, Dict[str, dict]]:
+    """The ranking prompt, and a mapping from item number to article."""
+    item_to_dict = {}
+    formatted_items = []
+    for i, item in enumerate(news_items):
+        # Use title + the snippet's key sentences for ranking string
+        snippet = item.get("snippet", item.get("summary", "")) or ""
+        snippet = fit_text(snippet, RANK_SNIPPET_TOKENS, lead_sentences=1)
+        summary = f"{item.get('title', '')}: {snippet}"
+        novelty = item.get("novelty")
+        if novelty is not None:
+            summary += f" [novelty {novelty:.2f}]"
+        formatted_items.append(f"{i + 1}. {summary}")
+        item_to_dict[str(i + 1)] = item  # Map index to dict
+
+    formatted_str = "\n".join(formatted_items)
+    return PROMPT_PREFIX + formatted_str + "\n", item_to_dict
+
+
+def _parse_ranking(response, item_to_dict: Dict[str, dict]) -> list:
+    # Extract text depending on type of response
+    if hasattr(response, "content"):
+        ranked_text = response.content.strip()
+    else:
+        ranked_text = str(response).strip()
+
+    # Extract the indices of the top 3 items
+    top_indices = []
+    for line in ranked_text.split("\n"):
+        line = line.strip()
+        if line and line[0].isdigit():
+            idx = line.split(".", 1)[0]
+            if idx in item_to_dict:
+                top_indices.append(idx)
+        if len(top_indices) >= 3:
+            break
+
+    # Return the original dicts in ranked order
+    return [item_to_dict[idx] for idx in top_indices]
 
+
+def _fallback(news_items) -> list:
+    # The 3 most novel items (unscored items count as new)
+    return sorted(news_items, key=_novelty, reverse=True)[:3]
+
+
+@timed("rank")
 def Rank_News_Items(news_items):
     """
     Given a list of news items (dicts), ask LLM to rank and return top 3 dicts.
@@ -9,54 +75,26 @@ def Rank_News_Items(news_items):
     logger.info("Ranking news items...")
     print(news_items)
     try:
-        llm = ChatOllama(
-            model="hf.co/bartowski/Llama-3.2-1B-Instruct-GGUF",
-            temperature=0.3,
-        )
-
-        # Create a mapping from string summary to article dict
-        item_to_dict = {}
-        formatted_items = []
-        for i, item in enumerate(news_items):
-            # Use title + snippet for ranking string
-            summary = f"{item.get('title', '')}: {item.get('snippet', item.get('summary', ''))}"
-            formatted_items.append(f"{i + 1}. {summary}")
-            item_to_dict[str(i + 1)] = item  # Map index to dict
-
-        formatted_str = "\n".join(formatted_items)
-
-        system_prompt = f"""
-You are a news ranking assistant. Rank the following crypto/web3/blockchain news items
-by their importance and relevance for investors and traders.
-Return ONLY the top 3 items, no extra text.
-
-News items:
-{formatted_str}
-"""
+        system_prompt, item_to_dict = _build_prompt(news_items)
+        response = invoke("rank", system_prompt, temperature=0.3)
+        ITEMS.inc(len(news_items), stage="ranked")
+        return _parse_ranking(response, item_to_dict)
 
-        response = llm.invoke(system_prompt)
-
-        # Extract text depending on type of response
-        if hasattr(response, "content"):
-            ranked_text = response.content.strip()
-        else:
-            ranked_text = str(response).strip()
+    except Exception as e:
+        logger.error(f"Ranking error: {e}")
+        return _fallback(news_items)
 
-        # Extract the indices of the top 3 items
-        top_indices = []
-        for line in ranked_text.split("\n"):
-            line = line.strip()
-            if line and line[0].isdigit():
-                idx = line.split(".", 1)[0]
-                if idx in item_to_dict:
-                    top_indices.append(idx)
-            if len(top_indices) >= 3:
-                break
 
-        # Return the original dicts in ranked order
-        return [item_to_dict[idx] for idx in top_indices]
+@timed("rank")
+async def rank_news_items_async(news_items):
+    """Rank_News_Items() for the asyncio pipeline."""
+    logger.info("Ranking news items...")
+    try:
+        system_prompt, item_to_dict = _build_prompt(news_items)
+        response = await ainvoke("rank", system_prompt, temperature=0.3)
+        ITEMS.inc(len(news_items), stage="ranked")
+        return _parse_ranking(response, item_to_dict)
 
     except Exception as e:
         logger.error(f"Ranking error: {e}")
-        # Fallback: just return first 3 items
-        return news_items[:3]
+        return _fallback(news_items)
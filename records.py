@@ -0,0 +1,120 @@
+import zlib
+from typing import Any, List, Optional
+
+COMPRESS_MIN_BYTES = 512  # Shorter texts are cheaper to keep as plain bytes
+
+
+class CompactText:
+    """Text held as (usually zlib-compressed) UTF-8 bytes; str() decodes it."""
+
+    __slots__ = ("_data", "_compressed", "length")
+
+    def __init__(self, text: str):
+        raw = text.encode("utf-8")
+        self._compressed = len(raw) >= COMPRESS_MIN_BYTES
+        self._data = zlib.compress(raw, 1) if self._compressed else raw
+        self.length = len(text)
+
+    def __str__(self) -> str:
+        raw = zlib.decompress(self._data) if self._compressed else self._data
+        return raw.decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data)
+
+
+class ArticleRecord:
+    """
+    One candidate article as it moves through a run.
+
+    full_text is stored compressed and decoded on each access; call release()
+    once the article is rejected so its text can be freed. Supports the
+    dict-style access (article["link"], article.get("snippet")) that the
+    pipeline stages were written against.
+    """
+
+    __slots__ = (
+        "title",
+        "snippet",
+        "link",
+        "publish_date",
+        "topics",
+        "source",
+        "priority",
+        "novelty",
+        "embedding",
+        "_full_text",
+    )
+    FIELDS = (
+        "title",
+        "snippet",
+        "link",
+        "publish_date",
+        "full_text",
+        "topics",
+        "source",
+        "priority",
+        "novelty",
+    )
+
+    def __init__(
+        self,
+        link: str,
+        title: str = "",
+        snippet: Optional[str] = None,
+        publish_date: Optional[str] = None,
+        full_text: str = "",
+        topics: Optional[List[str]] = None,
+        source: str = "",
+        priority: int = 5,
+        novelty: Optional[float] = None,
+    ):
+        self.link = link
+        self.title = title
+        self.snippet = snippet
+        self.publish_date = publish_date
+        self.full_text = full_text
+        self.topics = list(topics or [])
+        self.source = source
+        self.priority = priority
+        self.novelty = novelty  # 0 = already posted, 1 = unlike any past post
+        self.embedding = None  # Unit vector set by embeddings.score_novelty
+
+    @property
+    def full_text(self) -> str:
+        return str(self._full_text) if self._full_text is not None else ""
+
+    @full_text.setter
+    def full_text(self, text: Optional[str]):
+        self._full_text = CompactText(text) if text else None
+
+    def release(self):
+        """Drop the article text and embedding; metadata stays for logging."""
+        self._full_text = None
+        self.embedding = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord({(self.title or '')[:60]!r}, {self.link!r})"
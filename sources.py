@@ -0,0 +1,80 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+from config import (
+    logger,
+    SOURCES_FILE,
+    RSS_URLS,
+    SCRAPE_BASE_URLS,
+    HTTP_TIMEOUT_SECONDS,
+)
+
+SOURCE_TYPES = ("rss", "scrape")
+
+
+@dataclass
+class Source:
+    """One news source from the registry."""
+
+    name: str
+    type: str  # "rss" or "scrape"
+    url: str
+    priority: int = 5  # Higher gets a larger share of each run's time budget
+    poll_interval: int = 3600  # Minimum seconds between polls
+    max_concurrency: int = 2  # Parallel article downloads for this source
+    timeout: float = HTTP_TIMEOUT_SECONDS
+    keywords: Optional[List[str]] = None  # Overrides config.KEYWORDS
+    enabled: bool = True
+    extra: dict = field(default_factory=dict)
+
+
+def _from_entry(entry: dict) -> Optional[Source]:
+    known = set(Source.__dataclass_fields__) - {"extra"}
+    try:
+        source = Source(
+            **{k: v for k, v in entry.items() if k in known},
+            extra={k: v for k, v in entry.items() if k not in known},
+        )
+        source.priority = max(1, int(source.priority))
+        source.max_concurrency = max(1, int(source.max_concurrency))
+        source.timeout = float(source.timeout)
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning(f"Skipping invalid source entry {entry}: {e}")
+        return None
+    if source.type not in SOURCE_TYPES:
+        logger.warning(f"Skipping source '{source.name}': unknown type {source.type}")
+        return None
+    return source
+
+
+def default_sources() -> List[Source]:
+    """Registry equivalent to the RSS_URLS / SCRAPE_BASE_URLS lists."""
+    return [Source(name=url, type="rss", url=url) for url in RSS_URLS] + [
+        Source(name=url, type="scrape", url=url) for url in SCRAPE_BASE_URLS
+    ]
+
+
+def load_sources(path: str = SOURCES_FILE) -> List[Source]:
+    """
+    Load enabled sources from the JSON registry at path, highest priority first.
+    Falls back to the config lists when the file is missing or unreadable.
+    """
+    if not os.path.exists(path):
+        logger.info(f"No source registry at {path}; using config lists.")
+        sources = default_sources()
+    else:
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+            if not isinstance(entries, list):
+                raise ValueError("expected a JSON list of sources")
+            sources = [s for s in map(_from_entry, entries) if s]
+            logger.info(f"Loaded {len(sources)} sources from {path}")
+        except (ValueError, IOError) as e:  # JSONDecodeError is a ValueError
+            logger.error(f"Failed to load {path}: {e}. Using config lists.")
+            sources = default_sources()
+
+    return sorted(
+        (s for s in sources if s.enabled), key=lambda s: s.priority, reverse=True
+    )
@@ -1,21 +1,15 @@
 
 # summarize_article_social.py
-from langchain_ollama import ChatOllama
-from config import logger
-
-
-def summarize_article(article_text: str) -> str:
-    """
-    Create a short, impactful, and engaging crypto news post suitable for social media.
-    This version uses enhanced prompt engineering for better hooks and readability.
-    """
-    try:
-        llm = ChatOllama(
-            model="hf.co/bartowski/Llama-3.2-1B-Instruct-GGUF",
-            temperature=0.9,  # slightly higher for engaging tone
-        )
-
-        system_prompt = f"""
+import asyncio
+from typing import Callable, Optional
+from config import logger, SUMMARY_INPUT_TOKENS
+from llm import ainvoke, invoke
+from metrics import timed
+from prompts import fit_text
+
+# Everything up to the article text is identical on every call, so Ollama can
+# reuse its cached evaluation of this prefix and only process the article.
+PROMPT_PREFIX = """
 You are a professional **crypto journalist and social media strategist** writing for a global audience.
 
 🎯 **Your mission:**
@@ -33,43 +27,82 @@ Make it sound like breaking news or a strong insight — something people want t
 - Length: 50–100 words max.
 
 💡 **Examples:**
-1️⃣ *Breaking:* Ethereum’s latest upgrade boosts scalability by 20%, setting the stage for mass DeFi adoption. Developers say this could redefine transaction efficiency across Layer-2 chains.  
-2️⃣ Bitcoin miners are seeing profit surges after the halving — despite energy costs climbing. The network’s resilience shows investor confidence remains strong.  
+1️⃣ *Breaking:* Ethereum’s latest upgrade boosts scalability by 20%, setting the stage for mass DeFi adoption. Developers say this could redefine transaction efficiency across Layer-2 chains.
+2️⃣ Bitcoin miners are seeing profit surges after the halving — despite energy costs climbing. The network’s resilience shows investor confidence remains strong.
 3️⃣ Ripple gains momentum as another central bank explores its blockchain for digital currencies — a quiet but powerful move toward institutional adoption.
 
 📰 **Article:**
-\"\"\"{article_text}\"\"\"
+\"\"\""""
+
+PROMPT_SUFFIX = """\"\"\"
 
 ✍️ Now craft one powerful social-media-ready post:
 """
 
-        response = llm.invoke(system_prompt)
 
-        summary = (
-            response.strip()
-            if isinstance(response, str)
-            else getattr(response, "content", "").strip()
-        )
+def _build_prompt(article_text: str) -> str:
+    excerpt = fit_text(article_text, SUMMARY_INPUT_TOKENS)
+    return PROMPT_PREFIX + excerpt + PROMPT_SUFFIX
 
-        # Cleanup unwanted prefixes or meta language
-        summary_lines = summary.split("\n")
-        cleaned_summary = " ".join(
-            line.strip()
-            for line in summary_lines
-            if line.strip()
-            and not line.lower().startswith(("here is", "summary:", "this article"))
-        )
 
-        # Ensure concise tweet-style limit
-        if len(cleaned_summary) > 280:
-            cleaned_summary = cleaned_summary[:277].rsplit(" ", 1)[0] + "…"
+def _clean_summary(response) -> str:
+    summary = (
+        response.strip()
+        if isinstance(response, str)
+        else getattr(response, "content", "").strip()
+    )
+
+    # Cleanup unwanted prefixes or meta language
+    summary_lines = summary.split("\n")
+    cleaned_summary = " ".join(
+        line.strip()
+        for line in summary_lines
+        if line.strip()
+        and not line.lower().startswith(("here is", "summary:", "this article"))
+    )
+
+    # Ensure concise tweet-style limit
+    if len(cleaned_summary) > 280:
+        cleaned_summary = cleaned_summary[:277].rsplit(" ", 1)[0] + "…"
 
-        if not cleaned_summary:
-            raise ValueError("No valid summary extracted")
+    if not cleaned_summary:
+        raise ValueError("No valid summary extracted")
 
-        return cleaned_summary
+    return cleaned_summary
 
+
+@timed("summarize")
+def summarize_article(
+    article_text: str, fallback: Optional[Callable[[], str]] = None
+) -> str:
+    """
+    Create a short, impactful, and engaging crypto news post suitable for social media.
+    This version uses enhanced prompt engineering for better hooks and readability.
+    The article is condensed to its lead and key sentences within
+    SUMMARY_INPUT_TOKENS first. If the LLM fails, returns fallback() when
+    given, else the start of the article.
+    """
+    try:
+        # slightly higher temperature for engaging tone
+        response = invoke("summarize", _build_prompt(article_text), temperature=0.9)
+        return _clean_summary(response)
     except Exception as e:
         logger.error(f"Summarization error: {e}")
-        return article_text[:200]
+        return fallback() if fallback else article_text[:200]
 
+
+@timed("summarize")
+async def summarize_article_async(
+    article_text: str, fallback: Optional[Callable[[], str]] = None
+) -> str:
+    """summarize_article() for the asyncio pipeline; fallback runs in a thread."""
+    try:
+        response = await ainvoke(
+            "summarize", _build_prompt(article_text), temperature=0.9
+        )
+        return _clean_summary(response)
+    except Exception as e:
+        logger.error(f"Summarization error: {e}")
+        if fallback:
+            return await asyncio.to_thread(fallback)
+        return article_text[:200]
@@ -0,0 +1,220 @@
+"""
+Worker mode: run several pipeline processes (on one or more hosts) against a
+shared SQLite job store (JOB_STORE_PATH).
+
+Every worker leases "article" jobs, extracting, deduping and summarizing one
+candidate link per job. The worker holding the leader lease also runs the
+scheduler tick: it polls due sources for candidate links and enqueues them,
+then ranks and posts the finished articles. Every post is claimed in the job
+store first, so each story goes out once per account even when several
+workers see it.
+"""
+
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+from config import (
+    logger,
+    LEADER_LEASE_SECONDS,
+    POLL_TICK_SECONDS,
+    WORKER_THREADS,
+)
+from accounts import load_accounts
+from discovery import mark_links_seen, site_of
+from fastpath import try_fast_path
+from fetcher import (
+    extract_candidate,
+    list_candidates,
+    poll_results,
+    reset_fetch_cache,
+)
+from jobstore import JobStore
+from lazy import lazy_import
+from main import (
+    poller,
+    prepare_article,
+    queue_article,
+    rank_and_post,
+    start_monitor_thread,
+)
+from metrics import JOBS, LAST_RUN, stage_timer
+from records import ArticleRecord
+from sources import Source, load_sources
+
+LEADER_LEASE = "scheduler"
+IDLE_SLEEP_SECONDS = 2
+
+
+def article_to_payload(article: ArticleRecord, accounts: List[str]) -> Dict:
+    payload = article.to_dict()
+    if article.embedding is not None:
+        payload["embedding"] = article.embedding.tolist()
+    return {"article": payload, "accounts": accounts}
+
+
+def article_from_payload(payload: Dict) -> ArticleRecord:
+    data = dict(payload)
+    embedding = data.pop("embedding", None)
+    article = ArticleRecord(**data)
+    if embedding is not None:
+        article.embedding = lazy_import("numpy").asarray(embedding, "float32")
+    return article
+
+
+def process_article_job(payload: Dict) -> Dict:
+    """Extract, dedupe and summarize one candidate link."""
+    source = Source(**payload["source"])
+    article = extract_candidate(source, payload["candidate"])
+    if article is None or try_fast_path(article, source):
+        return {"article": None, "accounts": []}
+    interested = prepare_article(article, load_accounts())
+    if not interested:
+        return {"article": None, "accounts": []}
+    return article_to_payload(article, [account.name for account in interested])
+
+
+def work_loop(store: JobStore, stop: threading.Event):
+    """Lease and run article jobs until stop is set."""
+    while not stop.is_set():
+        try:
+            job = store.lease("article")
+        except Exception as e:
+            logger.error(f"Failed to lease a job: {e}")
+            stop.wait(IDLE_SLEEP_SECONDS)
+            continue
+        if job is None:
+            stop.wait(IDLE_SLEEP_SECONDS)
+            continue
+        try:
+            with stage_timer("job_article"):
+                result = process_article_job(job.payload)
+            store.complete(job, result)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed (attempt {job.attempts}): {e}")
+            store.fail(job, str(e))
+
+
+def enqueue_due_sources(store: JobStore) -> int:
+    """Poll due sources for candidate links and enqueue one job per new link."""
+    sources = poller.due(load_sources())
+    queued = 0
+    for source in sources:
+        started = time.monotonic()
+        try:
+            candidates = list_candidates(source)
+        except Exception as e:
+            logger.error(f"Failed to poll {source.name} ({source.url}): {e}")
+            continue
+        for candidate in candidates:
+            if store.enqueue(
+                "article",
+                candidate["link"],
+                {"source": asdict(source), "candidate": candidate},
+                source.priority,
+            ):
+                queued += 1
+        if source.type == "scrape":
+            mark_links_seen(site_of(source.url), [c["link"] for c in candidates])
+        result = poll_results[source.name]
+        poller.observe(
+            source,
+            result["entry_times"],
+            result["new_links"],
+            time.monotonic() - started,
+        )
+    if sources:
+        poller.save()
+        logger.info(f"Enqueued {queued} article jobs from {len(sources)} sources")
+    return queued
+
+
+def leader_tick(store: JobStore, is_leader: threading.Event):
+    """Enqueue due sources, then rank and post whatever workers have finished."""
+    if not is_leader.is_set():
+        return
+    run_stats = {"sources": 0, "fetched": 0, "queued": 0, "posted": 0}
+    started = time.time()
+    try:
+        with stage_timer("pipeline"):
+            reset_fetch_cache()
+            run_stats["fetched"] = enqueue_due_sources(store)
+            accounts = {account.name: account for account in load_accounts()}
+            articles = []
+            results = store.done_results("article")
+            for _, result in results:
+                if not result["article"]:
+                    continue
+                article = article_from_payload(result["article"])
+                for name in result["accounts"]:
+                    if name in accounts:
+                        queue_article(accounts[name], article)
+                articles.append(article)
+            run_stats["queued"] = len(articles)
+            rank_and_post(list(accounts.values()), articles, run_stats)
+            # Only now, so a failed tick leaves the results for the next one
+            store.consume([job_id for job_id, _ in results])
+            for status, count in store.counts().items():
+                JOBS.set(count, status=status)
+            store.purge()
+    except Exception as e:
+        # Like a failed scheduled job: log it and try again next tick
+        logger.error(f"Leader tick failed: {e}")
+    finally:
+        LAST_RUN.set(started, field="timestamp")
+        LAST_RUN.set(time.time() - started, field="duration_seconds")
+        for field, value in run_stats.items():
+            LAST_RUN.set(value, field=field)
+
+
+def leader_heartbeat(
+    store: JobStore, is_leader: threading.Event, stop: threading.Event
+):
+    """Keep trying to take or renew the leader lease."""
+    while not stop.is_set():
+        try:
+            leader = store.acquire_lease(LEADER_LEASE, LEADER_LEASE_SECONDS)
+        except Exception as e:
+            logger.error(f"Leader lease check failed: {e}")
+            leader = False
+        if leader and not is_leader.is_set():
+            logger.info(f"{store.owner} is now the leader")
+        elif not leader and is_leader.is_set():
+            logger.warning(f"{store.owner} lost the leader lease")
+        if leader:
+            is_leader.set()
+        else:
+            is_leader.clear()
+        stop.wait(LEADER_LEASE_SECONDS / 3)
+
+
+def run_worker(store: Optional[JobStore] = None):
+    store = store or JobStore()
+    stop = threading.Event()
+    is_leader = threading.Event()
+    logger.info(f"Starting worker {store.owner} with {WORKER_THREADS} job threads")
+    start_monitor_thread()
+
+    threads = [
+        threading.Thread(target=leader_heartbeat, args=(store, is_leader, stop))
+    ] + [
+        threading.Thread(target=work_loop, args=(store, stop))
+        for _ in range(WORKER_THREADS)
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        while True:
+            leader_tick(store, is_leader)
+            time.sleep(POLL_TICK_SECONDS)
+    except KeyboardInterrupt:
+        logger.info("Stopping worker...")
+        stop.set()
+        if is_leader.is_set():
+            store.release_lease(LEADER_LEASE)
+
+
+if __name__ == "__main__":
+    run_worker()
@@ -1,18 +1,29 @@
-from typing import Optional
-import tweepy
-from config import logger, X_API_KEY, X_API_SECRET, X_ACCESS_TOKEN, X_ACCESS_SECRET
+from typing import TYPE_CHECKING, Dict, Optional
+from config import logger, x_credentials
+from lazy import lazy_import
 
+if TYPE_CHECKING:
+    import tweepy
+    import tweepy.asynchronous
 
-def init_twitter_client() -> Optional[tweepy.Client]:
+# Async clients by access token, for the asyncio pipeline's event loop
+_async_clients: Dict[str, "tweepy.asynchronous.AsyncClient"] = {}
+
+
+def init_twitter_client(
+    credentials: Optional[Dict[str, str]] = None,
+) -> Optional["tweepy.Client"]:
+    """X v2 client for a credential profile (see config.x_credentials)."""
+    credentials = credentials or x_credentials()
     try:
-        if not all([X_API_KEY, X_API_SECRET, X_ACCESS_TOKEN, X_ACCESS_SECRET]):
+        if not all(credentials.values()):
             raise ValueError("Missing X API credentials")
 
-        client = tweepy.Client(
-            consumer_key=X_API_KEY,
-            consumer_secret=X_API_SECRET,
-            access_token=X_ACCESS_TOKEN,
-            access_token_secret=X_ACCESS_SECRET,
+        client = lazy_import("tweepy").Client(
+            consumer_key=credentials["api_key"],
+            consumer_secret=credentials["api_secret"],
+            access_token=credentials["access_token"],
+            access_token_secret=credentials["access_secret"],
             wait_on_rate_limit=True,
         )
         logger.info("X client initialized successfully")
@@ -20,3 +31,32 @@ def init_twitter_client() -> Optional[tweepy.Client]:
     except Exception as e:
         logger.error(f"Failed to init X client: {e}")
         return None
+
+
+def init_async_twitter_client(
+    credentials: Optional[Dict[str, str]] = None,
+) -> Optional["tweepy.asynchronous.AsyncClient"]:
+    """
+    Async X v2 client for a credential profile, or None when the profile is
+    incomplete or tweepy's async support (tweepy[async], i.e. aiohttp) is not
+    installed.
+    """
+    credentials = credentials or x_credentials()
+    if not all(credentials.values()):
+        logger.error("Failed to init async X client: Missing X API credentials")
+        return None
+    key = credentials["access_token"]
+    if key not in _async_clients:
+        try:
+            asynchronous = lazy_import("tweepy.asynchronous")
+        except ImportError as e:
+            logger.warning(f"Async X client unavailable ({e}); posting in threads")
+            return None
+        _async_clients[key] = asynchronous.AsyncClient(
+            consumer_key=credentials["api_key"],
+            consumer_secret=credentials["api_secret"],
+            access_token=credentials["access_token"],
+            access_token_secret=credentials["access_secret"],
+            wait_on_rate_limit=True,
+        )
+    return _async_clients[key]